@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Hashable, Optional
+
+
+def as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc, microsecond=0) if value.tzinfo is None else value.replace(microsecond=0)
+
+
+class CatalogGeneration:
+    def __init__(self):
+        self.version = 0
+        self.value = 0
+        self.profile_value = 0
+        self.girl_values: dict[int, int] = {}
+        self.modified_at = datetime.fromtimestamp(0, timezone.utc)
+        self.lock = threading.Lock()
+
+    def bump(
+        self,
+        girl_ids: Optional[set[int]] = None,
+        version: Optional[int] = None,
+        modified_at: Optional[datetime] = None,
+    ) -> int:
+        with self.lock:
+            self.value += 1
+            if version is not None:
+                self.version = max(self.version, version)
+            if modified_at is not None:
+                self.modified_at = max(self.modified_at, as_utc(modified_at))
+            if girl_ids is None:
+                self.profile_value += 1
+                self.girl_values.clear()
+            else:
+                for girl_id in girl_ids:
+                    self.girl_values[girl_id] = self.value
+            return self.value
+
+    def profile(self, girl_id: int) -> tuple[int, int]:
+        return self.profile_value, self.girl_values.get(girl_id, 0)
+
+    def sync(self, version: int, modified_at: Optional[datetime] = None):
+        with self.lock:
+            self.version = version
+            if modified_at is not None:
+                self.modified_at = as_utc(modified_at)
+
+    def etag(self, *parts) -> str:
+        tag = "-".join(str(part) for part in (self.version, *parts) if part != "")
+        return f'W/"{tag}"'
+
+
+class TTLCache:
+    MISSING = object()
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: OrderedDict[Hashable, tuple[int, float, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, generation: int) -> Any:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return self.MISSING
+            entry_generation, expires_at, value = entry
+            if entry_generation != generation or expires_at < time.monotonic():
+                del self.entries[key]
+                self.misses += 1
+                return self.MISSING
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: int):
+        with self.lock:
+            self.entries[key] = (generation, time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+catalog_generation = CatalogGeneration()
+
+caches: dict[str, TTLCache] = {}
+
+
+def register_cache(name: str, maxsize: int, ttl: float) -> TTLCache:
+    caches[name] = TTLCache(maxsize=maxsize, ttl=ttl)
+    return caches[name]
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+
+from application.cache import catalog_generation
+from application.config import settings
+from application.database import ReadSessionLocal
+from application.search import catalog_index
+from application.services import ChangeService
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogWatcher:
+    def __init__(self, database: Optional[str], interval: float):
+        self.database = database
+        self.interval = interval
+        self.enabled = interval > 0 and database not in (None, "", ":memory:")
+        self.connection: Optional[sqlite3.Connection] = None
+        self.data_version: Optional[int] = None
+        self.version: Optional[int] = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            self.connection = sqlite3.connect(
+                f"{Path(self.database).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+            )
+            self.data_version = self.read_data_version()
+            with ReadSessionLocal() as db:
+                self.version = ChangeService(db).get_catalog_version().version
+
+    def stop(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def read_data_version(self) -> int:
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def poll(self) -> bool:
+        with self.lock:
+            data_version = self.read_data_version()
+            if data_version == self.data_version:
+                return False
+            self.data_version = data_version
+            with ReadSessionLocal() as db:
+                catalog, girl_ids = ChangeService(db).get_changed_girl_ids(self.version)
+            version = catalog.version
+            if version == self.version:
+                return False
+            since, self.version = self.version, version
+
+        catalog_generation.bump(girl_ids, version, catalog.modified_at)
+        catalog_index.invalidate(girl_ids)
+        if girl_ids is None:
+            logger.info(f"Catalog changed from version {since} to {version}, caches dropped.")
+        else:
+            logger.debug(f"Catalog changed from version {since} to {version} for {len(girl_ids)} girls.")
+        return True
+
+    async def run(self):
+        try:
+            await run_in_threadpool(self.start)
+        except (sqlite3.Error, SQLAlchemyError) as e:
+            logger.warning(f"Catalog change tracking is unavailable, caches will not follow other workers: {e}")
+            self.stop()
+            return
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    await run_in_threadpool(self.poll)
+                except (sqlite3.Error, SQLAlchemyError) as e:
+                    logger.warning(f"Catalog change check failed: {e}")
+        finally:
+            self.stop()
+
+
+catalog_watcher = CatalogWatcher(make_url(settings.DATABASE_URL).database, settings.CACHE_SYNC_INTERVAL)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -5,6 +7,49 @@ class Settings(BaseSettings):
     SERVER_HOST: str = "127.0.0.1"
     SERVER_PORT: int = 8080
     DATABASE_URL: str = "sqlite:///./resources/escort.db"
+    DATABASE_ASYNC: bool = False
+    DATABASE_POOL_SIZE: int = 8
+    DATABASE_MAX_OVERFLOW: int = 16
+    DATABASE_POOL_TIMEOUT: int = 30
+    DATABASE_READ_ONLY_ENGINE: bool = False
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE: int = -65536
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_BUSY_TIMEOUT: int = 5000
+    SEARCH_ENGINE: str = "sql"
+    LISTING_CACHE_SIZE: int = 1024
+    LISTING_CACHE_TTL: int = 60
+    RENDERED_CACHE_SIZE: int = 30000
+    RENDERED_CACHE_TTL: int = 86400
+    CACHE_SYNC_INTERVAL: float = 0.5
+    HTTP_CACHE_MAX_AGE: int = 60
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    METRICS_ENABLED: bool = True
+    FACET_PRICE_BUCKET: int = 1000
+    BATCH_MAX_IDS: int = 50
+    EXPORT_BATCH_SIZE: int = 500
+    ADMIN_TOKEN: Optional[str] = None
+    ADMIN_BATCH_MAX_ITEMS: int = 1000
+    CHANGES_PAGE_SIZE: int = 500
+    CHANGES_MAX_PAGE_SIZE: int = 5000
+    CHANGES_TOMBSTONE_RETENTION_DAYS: int = 30
+    SKIP_INIT: bool = False
+    INIT_LOCK_FILE: str = "./resources/.init.lock"
+    INIT_BULK_IMPORT: bool = True
+    INIT_BATCH_SIZE: int = 1000
+    PHOTO_VARIANTS_DIR: str = "./resources/photo_variants"
+    PHOTO_VARIANT_WIDTHS: list[int] = [320, 640, 1280]
+    PHOTO_VARIANT_FORMATS: list[str] = ["webp", "jpeg"]
+    PHOTO_VARIANTS_ON_STARTUP: bool = False
+    PHOTO_CACHE_MAX_AGE: int = 86400
+
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return self.DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
 
     model_config = SettingsConfigDict(
         env_file='.env',
@@ -1,18 +1,125 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from starlette.concurrency import run_in_threadpool
 
 from application.config import settings
 
-engine = create_engine(
-    url=settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+
+def engine_options(url: str) -> dict:
+    database = make_url(url).database
+    if database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+    }
+
+
+def apply_sqlite_pragmas(engine: Engine, read_only: bool = False):
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT}")
+        if not read_only:
+            cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size = {settings.SQLITE_CACHE_SIZE}")
+        cursor.execute(f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+        if not read_only:
+            dbapi_connection.isolation_level = None
+
+    if not read_only:
+        @event.listens_for(engine, "begin")
+        def on_begin(connection):
+            immediate = connection.get_execution_options().get("sqlite_immediate", False)
+            connection.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+
+def create_sync_engine(read_only: bool = False) -> Engine:
+    sync_engine = create_engine(
+        url=settings.DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        **engine_options(settings.DATABASE_URL),
+    )
+    apply_sqlite_pragmas(sync_engine, read_only)
+    return sync_engine
+
+
+def create_async_sqlite_engine(read_only: bool = False):
+    new_engine = create_async_engine(
+        url=settings.ASYNC_DATABASE_URL,
+        **engine_options(settings.ASYNC_DATABASE_URL),
+    )
+    apply_sqlite_pragmas(new_engine.sync_engine, read_only)
+    return new_engine
+
+
+engine = create_sync_engine()
+read_engine = create_sync_engine(read_only=True) if settings.DATABASE_READ_ONLY_ENGINE else engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
+if settings.DATABASE_ASYNC:
+    async_engine = create_async_sqlite_engine()
+    async_read_engine = create_async_sqlite_engine(read_only=True) if settings.DATABASE_READ_ONLY_ENGINE else async_engine
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, autoflush=False, expire_on_commit=False)
+else:
+    async_engine = None
+    async_read_engine = None
+    AsyncSessionLocal = None
+    AsyncReadSessionLocal = None
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+get_session = get_async_db if settings.DATABASE_ASYNC else get_db
+get_read_session = get_async_read_db if settings.DATABASE_ASYNC else get_read_db
+
+
+async def dispose_engines():
+    for async_db_engine in {async_engine, async_read_engine} - {None}:
+        await async_db_engine.dispose()
+    for sync_engine in {engine, read_engine}:
+        sync_engine.dispose()
+
+
+async def run_db(db: Session | AsyncSession, fn, *args, **kwargs):
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
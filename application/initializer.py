@@ -1,12 +1,20 @@
 import datetime
+import json
 import logging
+import time
 from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
 
 from application import models
+from application.config import settings
 from application.database import SessionLocal
 from application.models import BodyType, BreastType, HairColor, Photo, Price
-from application.schemas import ServiceCreate, GirlCreate
-from application.services import ServiceService, GirlService
+from application.schemas import ServiceCreate, GirlCreate, PhotoBase, PriceBase
+from application.search import catalog_index
+from application.services import ServiceService, GirlService, commit_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -27,10 +35,32 @@ class Initializer:
 
     @staticmethod
     def json_to_dict(file_path: Path) -> dict:
-        import json
         with open(file_path, "r", encoding="utf-8") as file:
             return json.load(file)
 
+    @staticmethod
+    def iter_json_array(file_path: Path, chunk_size: int = 1 << 16) -> Iterator[dict]:
+        decoder = json.JSONDecoder()
+        with open(file_path, "r", encoding="utf-8") as file:
+            buffer = file.read(chunk_size).lstrip()
+            if not buffer.startswith("["):
+                raise ValueError(f"{file_path.name} must contain a JSON array")
+            buffer = buffer[1:]
+            while True:
+                buffer = buffer.lstrip().removeprefix(",").lstrip()
+                if buffer.startswith("]"):
+                    return
+                try:
+                    item, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    chunk = file.read(chunk_size)
+                    if not chunk:
+                        raise
+                    buffer += chunk
+                    continue
+                yield item
+                buffer = buffer[end:]
+
     @staticmethod
     def dict_to_service(data: dict) -> ServiceCreate:
         return ServiceCreate(
@@ -115,7 +145,17 @@ class Initializer:
         girl_service = GirlService(self.db)
 
         if not girl_service.get_girls(limit=1):
-            if self.files.get("girls"):
+            if self.files.get("girls") and settings.INIT_BULK_IMPORT:
+                started = time.perf_counter()
+                imported, failed = self.bulk_init_girls(self.files["girls"], settings.INIT_BATCH_SIZE)
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"Imported {imported} girls with {failed} errors in {elapsed:.1f}s "
+                    f"({imported / elapsed if elapsed else 0:.0f} girls/s)."
+                )
+                catalog_index.invalidate()
+                commit_catalog(self.db)
+            elif self.files.get("girls"):
                 girls_data = self.json_to_dict(self.files["girls"])
                 for girl_data in girls_data:
                     new_girl = girl_service.create_girl(self.dict_to_girl_create(girl_data))
@@ -127,6 +167,69 @@ class Initializer:
                     new_girl.services.extend(new_services)
                     self.db.add(new_girl)
                     self.db.commit()
+                commit_catalog(self.db)
+
+    @staticmethod
+    def dict_to_rows(data: dict) -> tuple[dict, list[dict], list[dict], list[dict]]:
+        girl = Initializer.dict_to_girl_create(data).model_dump()
+        photos = [PhotoBase.model_validate(photo).model_dump() for photo in data.get("photos", [])]
+        prices = [PriceBase.model_validate(price).model_dump() for price in data.get("prices", [])]
+        services = {}
+        for girl_service in data.get("services", []):
+            service_id = int(girl_service["service_id"])
+            services[service_id] = {"service_id": service_id, "additional_cost": girl_service.get("additional_cost")}
+        return girl, photos, prices, list(services.values())
+
+    def insert_girls_batch(self, batch: list[tuple[dict, list[dict], list[dict], list[dict]]]):
+        girl_ids = self.db.scalars(
+            insert(models.Girl).returning(models.Girl.id, sort_by_parameter_order=True),
+            [girl for girl, _, _, _ in batch],
+        ).all()
+        photos, prices, services = [], [], []
+        for girl_id, (_, girl_photos, girl_prices, girl_services) in zip(girl_ids, batch):
+            photos += [dict(photo, girl_id=girl_id) for photo in girl_photos]
+            prices += [dict(price, girl_id=girl_id) for price in girl_prices]
+            services += [dict(girl_service, girl_id=girl_id) for girl_service in girl_services]
+        for model, rows in ((models.Photo, photos), (models.Price, prices), (models.GirlService, services)):
+            if rows:
+                self.db.execute(insert(model), rows)
+        self.db.commit()
+
+    def iter_girl_batches(self, file_path: Path, batch_size: int) -> Iterator[tuple[list, int]]:
+        batch, invalid = [], 0
+        for position, girl_data in enumerate(self.iter_json_array(file_path)):
+            try:
+                batch.append(self.dict_to_rows(girl_data))
+            except (ValueError, TypeError, KeyError) as e:
+                invalid += 1
+                logger.warning(f"Girl #{position} skipped: {e}")
+            if len(batch) + invalid >= batch_size:
+                yield batch, invalid
+                batch, invalid = [], 0
+        if batch or invalid:
+            yield batch, invalid
+
+    def bulk_init_girls(self, file_path: Path, batch_size: int) -> tuple[int, int]:
+        imported = failed = 0
+        for number, (batch, invalid) in enumerate(self.iter_girl_batches(file_path, batch_size), start=1):
+            started = time.perf_counter()
+            inserted = 0
+            if batch:
+                try:
+                    self.insert_girls_batch(batch)
+                    inserted = len(batch)
+                except SQLAlchemyError as e:
+                    self.db.rollback()
+                    invalid += len(batch)
+                    logger.error(f"Batch {number} rolled back: {e}")
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"Batch {number}: {inserted} girls imported, {invalid} errors, "
+                f"{inserted / elapsed if elapsed else 0:.0f} girls/s."
+            )
+            imported += inserted
+            failed += invalid
+        return imported, failed
 
     def init_all(self):
         if self.files.get("services"):
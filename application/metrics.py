@@ -0,0 +1,217 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from application.cache import caches
+from application.config import settings
+from application.database import async_engine, async_read_engine, engine, read_engine
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+TRANSACTION_CONTROL = ("BEGIN", "COMMIT", "END", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    labels = [f'{name}="{escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(self.labels, label_values)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        self.series: dict[tuple, list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, (counts, total, count) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                    cumulative += bucket_count
+                    labels = format_labels(self.labels, label_values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {total:g}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+http_requests = Counter("http_requests_total", "HTTP requests handled.", ("method", "route", "status"))
+http_latency = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", LATENCY_BUCKETS, ("method", "route")
+)
+request_statements = Histogram(
+    "db_statements_per_request", "SQL statements executed per HTTP request.", STATEMENT_BUCKETS, ("route",)
+)
+request_db_time = Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL per HTTP request.", LATENCY_BUCKETS, ("route",)
+)
+db_statements = Counter("db_statements_total", "SQL statements executed.", ("engine",))
+db_time = Counter("db_statement_duration_seconds_total", "Time spent executing SQL.", ("engine",))
+
+engines: dict[str, Engine] = {}
+
+
+def is_transaction_control(statement: str) -> bool:
+    return statement.lstrip()[:9].upper().startswith(TRANSACTION_CONTROL)
+
+
+def instrument_engine(name: str, engine: Engine):
+    if name in engines:
+        return
+    engines[name] = engine
+
+    # Every cursor execution is timed, but only real queries are counted.
+    # BEGIN from the database begin hook and savepoints are transaction control.
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - connection.info["query_started"].pop()
+        if is_transaction_control(statement):
+            return
+        db_statements.inc(name)
+        db_time.inc(name, amount=elapsed)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None and context.execution_context is not None:
+            started = context.connection.info.get("query_started")
+            if started:
+                started.pop()
+
+
+def gauge(name: str, help_text: str, samples: list[tuple[str, float]]) -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    lines.extend(f"{name}{labels} {value:g}" for labels, value in samples)
+    return lines
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in (http_requests, http_latency, request_statements, request_db_time, db_statements, db_time):
+        lines.extend(metric.render())
+
+    cache_stats = {name: cache.stats() for name, cache in caches.items()}
+    for field, kind in (("hits", "counter"), ("misses", "counter"), ("evictions", "counter")):
+        name = f"cache_{field}_total"
+        lines.extend([f"# HELP {name} Cache {field}.", f"# TYPE {name} {kind}"])
+        lines.extend(f'{name}{{cache="{cache}"}} {stats[field]}' for cache, stats in cache_stats.items())
+    lines.extend(gauge("cache_entries", "Entries held per cache.", [
+        (f'{{cache="{cache}"}}', stats["size"]) for cache, stats in cache_stats.items()
+    ]))
+
+    pools = {name: engine.pool for name, engine in engines.items()}
+    for field in ("size", "checkedout", "overflow", "checkedin"):
+        samples = [
+            (f'{{engine="{name}"}}', max(getattr(pool, field)(), 0))
+            for name, pool in pools.items() if hasattr(pool, field)
+        ]
+        lines.extend(gauge(f"db_pool_{field}", f"Connection pool {field}.", samples))
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_stats.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                elapsed = time.perf_counter() - started
+                method, path = scope["method"], route.path
+                http_requests.inc(method, path, status_code)
+                http_latency.observe(elapsed, method, path)
+                request_statements.observe(stats.statements, path)
+                request_db_time.observe(stats.db_seconds, path)
+
+
+if settings.METRICS_ENABLED:
+    instrument_engine("write", engine)
+    if read_engine is not engine:
+        instrument_engine("read", read_engine)
+    if async_engine is not None:
+        instrument_engine("async_write", async_engine.sync_engine)
+    if async_read_engine is not None and async_read_engine is not async_engine:
+        instrument_engine("async_read", async_read_engine.sync_engine)
@@ -0,0 +1,189 @@
+import logging
+import sys
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from application import models
+from application.database import Base
+
+logger = logging.getLogger(__name__)
+
+
+def get_version(connection: Connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def set_version(connection: Connection, version: int):
+    connection.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+
+
+def create_indexes(connection: Connection):
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            if {column.name for column in index.columns} <= columns:
+                index.create(bind=connection, checkfirst=True)
+
+
+def add_listing_indexes(connection: Connection):
+    columns = {column["name"] for column in inspect(connection).get_columns(models.Girl.__tablename__)}
+    if "min_price" not in columns:
+        connection.exec_driver_sql("ALTER TABLE girls ADD COLUMN min_price INTEGER NOT NULL DEFAULT 0")
+    connection.execute(text(
+        "UPDATE girls SET min_price = "
+        "(SELECT COALESCE(MIN(current_cost), 0) FROM prices WHERE prices.girl_id = girls.id)"
+    ))
+    for trigger in models.MIN_PRICE_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+    create_indexes(connection)
+
+
+def add_photo_variants(connection: Connection):
+    models.PhotoVariant.__table__.create(bind=connection, checkfirst=True)
+
+
+def add_full_text_search(connection: Connection):
+    for statement in models.FTS_STATEMENTS:
+        connection.exec_driver_sql(statement)
+    for lang in models.Lang:
+        table = models.fts_table(lang)
+        connection.exec_driver_sql(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+
+
+def add_change_feed(connection: Connection):
+    models.CatalogVersion.__table__.create(bind=connection, checkfirst=True)
+    models.Tombstone.__table__.create(bind=connection, checkfirst=True)
+    connection.exec_driver_sql(models.CHANGE_FEED_STATEMENTS[0])
+    for model in models.CHANGE_TABLES.values():
+        table = model.__tablename__
+        columns = {column["name"] for column in inspect(connection).get_columns(table)}
+        if "version" not in columns:
+            connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        if "updated_at" not in columns:
+            connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN updated_at DATETIME")
+        connection.exec_driver_sql(
+            f"UPDATE {table} SET version = rowid + {models.CURRENT_VERSION_SQL}, updated_at = datetime('now')"
+        )
+        connection.exec_driver_sql(
+            f"UPDATE catalog_version SET version = version + (SELECT COALESCE(MAX(rowid), 0) FROM {table}) "
+            f"WHERE id = 1"
+        )
+    for statement in models.CHANGE_FEED_STATEMENTS[1:]:
+        connection.exec_driver_sql(statement)
+    create_indexes(connection)
+
+
+def add_photo_variant_stamps(connection: Connection):
+    for trigger in models.PHOTO_VARIANT_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+
+
+def add_catalog_modified_at(connection: Connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("catalog_version")}
+    if "modified_at" not in columns:
+        connection.exec_driver_sql("ALTER TABLE catalog_version ADD COLUMN modified_at DATETIME")
+    latest = " UNION ALL ".join(
+        f"SELECT MAX(updated_at) AS stamp FROM {model.__tablename__}" for model in models.CHANGE_TABLES.values()
+    )
+    connection.exec_driver_sql(
+        f"UPDATE catalog_version SET modified_at = COALESCE(modified_at, "
+        f"(SELECT MAX(stamp) FROM ({latest} UNION ALL SELECT MAX(deleted_at) FROM catalog_tombstones)), "
+        f"datetime('now')) WHERE id = 1"
+    )
+    for model in models.CHANGE_TABLES.values():
+        for operation in ("insert", "update", "delete"):
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {model.__tablename__}_version_{operation}")
+    for statement in models.CHANGE_FEED_STATEMENTS[1:]:
+        connection.exec_driver_sql(statement)
+
+
+MIGRATIONS = [
+    add_listing_indexes,
+    add_photo_variants,
+    add_full_text_search,
+    add_change_feed,
+    add_photo_variant_stamps,
+    add_catalog_modified_at,
+]
+
+
+def migrate(engine: Engine):
+    with engine.begin() as connection:
+        if not inspect(connection).has_table(models.Girl.__tablename__):
+            Base.metadata.create_all(bind=connection)
+            set_version(connection, len(MIGRATIONS))
+            logger.info(f"Database schema created at version {len(MIGRATIONS)}.")
+            return
+
+        version = get_version(connection)
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(connection)
+            set_version(connection, number)
+            logger.info(f"Database migrated to version {number} ({migration.__name__}).")
+
+        Base.metadata.create_all(bind=connection)
+        connection.exec_driver_sql("PRAGMA optimize")
+
+
+LISTING_FILTERS = dict(
+    age_min=18, age_max=80,
+    height_min=150, height_max=200,
+    weight_min=40, weight_max=100,
+    breast_min=0.0, breast_max=7.0,
+    price_min=1000, price_max=15000,
+)
+
+
+def explain_girls_query(db, sort_by, paginate: bool = True, **filters) -> list[str]:
+    from application.services import GirlService, encode_cursor
+
+    service = GirlService(db)
+    cursor = None
+    if paginate:
+        sample = service.get_girls(sort_by=sort_by, limit=1, loaders=())
+        cursor = encode_cursor(sort_by, service.sort_key(sample[0], sort_by), sample[0].id) if sample else None
+    statement = service.girls_query(sort_by=sort_by, cursor=cursor, loaders=(), **filters).statement
+    compiled = statement.compile(bind=db.get_bind(), compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+
+def explain_girls_queries(engine: Engine) -> dict[str, list[str]]:
+    from application.database import SessionLocal
+    from application.services import SortBy
+
+    with SessionLocal(bind=engine) as db:
+        return {sort_by.value: explain_girls_query(db, sort_by, **LISTING_FILTERS) for sort_by in SortBy}
+
+
+def full_scans(plan: list[str], rowid_order: bool = False) -> list[str]:
+    # A bare rowid scan is the listing order itself when sorting by id, so LIMIT stops it early.
+    return [
+        step for step in plan
+        if (step.startswith("SCAN") and "INDEX" not in step and not (rowid_order and step == "SCAN girls"))
+        or "TEMP B-TREE" in step
+    ]
+
+
+if __name__ == "__main__":
+    from application.database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    migrate(engine)
+
+    if "--explain" in sys.argv:
+        failed = False
+        for sort_by, plan in explain_girls_queries(engine).items():
+            print(f"{sort_by}:")
+            for step in plan:
+                print(f"    {step}")
+            scans = full_scans(plan, rowid_order=sort_by == "default")
+            if scans:
+                failed = True
+                print(f"    !! full scan or sort: {scans}")
+        sys.exit(1 if failed else 0)
@@ -1,6 +1,6 @@
 from enum import Enum as PyEnum
 
-from sqlalchemy import Column, Integer, Date, String, Float, Enum, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, Date, DateTime, String, Float, Enum, Boolean, ForeignKey, Index, DDL, event
 from sqlalchemy.orm import relationship
 
 from application.database import Base
@@ -20,14 +20,16 @@ class HairColor(str, PyEnum):
     BROWN = "brown"
 
     def get_translation(self, lang: Lang) -> str:
-        translations = {
-            "blonde": {Lang.UK: "Блондинка", Lang.RU: "Блондинка", Lang.EN: "Blondes"},
-            "brunette": {Lang.UK: "Брюнетка", Lang.RU: "Брюнетка", Lang.EN: "Brunettes"},
-            "fair": {Lang.UK: "Русява", Lang.RU: "Русая", Lang.EN: "Fair-haired"},
-            "redhead": {Lang.UK: "Руда", Lang.RU: "Рыжая", Lang.EN: "Redheads"},
-            "brown": {Lang.UK: "Шатенка", Lang.RU: "Шатенка", Lang.EN: "Brown-haired"},
-        }
-        return translations[self.value].get(lang, self.value)
+        return HAIR_COLOR_TRANSLATIONS[self.value].get(lang, self.value)
+
+
+HAIR_COLOR_TRANSLATIONS = {
+    "blonde": {Lang.UK: "Блондинка", Lang.RU: "Блондинка", Lang.EN: "Blondes"},
+    "brunette": {Lang.UK: "Брюнетка", Lang.RU: "Брюнетка", Lang.EN: "Brunettes"},
+    "fair": {Lang.UK: "Русява", Lang.RU: "Русая", Lang.EN: "Fair-haired"},
+    "redhead": {Lang.UK: "Руда", Lang.RU: "Рыжая", Lang.EN: "Redheads"},
+    "brown": {Lang.UK: "Шатенка", Lang.RU: "Шатенка", Lang.EN: "Brown-haired"},
+}
 
 
 class Ethnicity(str, PyEnum):
@@ -36,12 +38,14 @@ class Ethnicity(str, PyEnum):
     SLAVIC = "slavic"
 
     def get_translation(self, lang: Lang) -> str:
-        translations = {
-            "asian": {Lang.UK: "Азіатка", Lang.RU: "Азиатка", Lang.EN: "Asians"},
-            "mulatto": {Lang.UK: "Мулатка", Lang.RU: "Мулатка", Lang.EN: "Mulatto"},
-            "slavic": {Lang.UK: "Слов'янка", Lang.RU: "Славянка", Lang.EN: "Slavic"},
-        }
-        return translations[self.value].get(lang, self.value)
+        return ETHNICITY_TRANSLATIONS[self.value].get(lang, self.value)
+
+
+ETHNICITY_TRANSLATIONS = {
+    "asian": {Lang.UK: "Азіатка", Lang.RU: "Азиатка", Lang.EN: "Asians"},
+    "mulatto": {Lang.UK: "Мулатка", Lang.RU: "Мулатка", Lang.EN: "Mulatto"},
+    "slavic": {Lang.UK: "Слов'янка", Lang.RU: "Славянка", Lang.EN: "Slavic"},
+}
 
 
 class BodyType(str, PyEnum):
@@ -52,14 +56,16 @@ class BodyType(str, PyEnum):
     FAT = "fat"
 
     def get_translation(self, lang: Lang) -> str:
-        translations = {
-            "slim": {Lang.UK: "Худа", Lang.RU: "Худая", Lang.EN: "Slim"},
-            "fit": {Lang.UK: "Струнка", Lang.RU: "Стройная", Lang.EN: "Fit"},
-            "sport": {Lang.UK: "Спортивна", Lang.RU: "Спортивная", Lang.EN: "Sporty"},
-            "dense": {Lang.UK: "Щільна", Lang.RU: "Плотная", Lang.EN: "Dense"},
-            "fat": {Lang.UK: "Товста", Lang.RU: "Полная", Lang.EN: "Fat"},
-        }
-        return translations[self.value].get(lang, self.value)
+        return BODY_TYPE_TRANSLATIONS[self.value].get(lang, self.value)
+
+
+BODY_TYPE_TRANSLATIONS = {
+    "slim": {Lang.UK: "Худа", Lang.RU: "Худая", Lang.EN: "Slim"},
+    "fit": {Lang.UK: "Струнка", Lang.RU: "Стройная", Lang.EN: "Fit"},
+    "sport": {Lang.UK: "Спортивна", Lang.RU: "Спортивная", Lang.EN: "Sporty"},
+    "dense": {Lang.UK: "Щільна", Lang.RU: "Плотная", Lang.EN: "Dense"},
+    "fat": {Lang.UK: "Товста", Lang.RU: "Полная", Lang.EN: "Fat"},
+}
 
 
 class BreastType(str, PyEnum):
@@ -67,19 +73,21 @@ class BreastType(str, PyEnum):
     SILICONE = "silicone"
 
     def get_translation(self, lang: Lang) -> str:
-        translations = {
-            "natural": {
-                Lang.UK: "Натуральні",
-                Lang.RU: "Натуральная",
-                Lang.EN: "Natural",
-            },
-            "silicone": {
-                Lang.UK: "Силіконова",
-                Lang.RU: "Силиконовая",
-                Lang.EN: "Silicone",
-            },
-        }
-        return translations[self.value].get(lang, self.value)
+        return BREAST_TYPE_TRANSLATIONS[self.value].get(lang, self.value)
+
+
+BREAST_TYPE_TRANSLATIONS = {
+    "natural": {
+        Lang.UK: "Натуральні",
+        Lang.RU: "Натуральная",
+        Lang.EN: "Natural",
+    },
+    "silicone": {
+        Lang.UK: "Силіконова",
+        Lang.RU: "Силиконовая",
+        Lang.EN: "Silicone",
+    },
+}
 
 
 class Girl(Base):
@@ -104,10 +112,13 @@ class Girl(Base):
     description_ua = Column(String(512))
     description_ru = Column(String(512))
     description_en = Column(String(512))
+    min_price = Column(Integer, nullable=False, default=0, server_default="0")
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime)
 
-    photos = relationship("Photo", back_populates="girl")
-    prices = relationship("Price", back_populates="girl")
-    services = relationship("GirlService", back_populates="girl")
+    photos = relationship("Photo", back_populates="girl", order_by="Photo.order", cascade="all, delete-orphan")
+    prices = relationship("Price", back_populates="girl", cascade="all, delete-orphan")
+    services = relationship("GirlService", back_populates="girl", cascade="all, delete-orphan")
 
     def get_description(self, lang: Lang) -> str | None:
         if lang == Lang.UK:
@@ -118,11 +129,13 @@ class Girl(Base):
             return self.description_en or None
         return None
 
-    @property
-    def min_price(self) -> int:
-        if self.prices:
-            return min(price.current_cost for price in self.prices)
-        return 0
+    __table_args__ = (
+        Index("ix_girls_listing_birth_date", "birth_date", "id", "height", "weight", "breast_size", "min_price"),
+        Index("ix_girls_listing_weight", "weight", "id", "height", "breast_size", "birth_date", "min_price"),
+        Index("ix_girls_listing_breast_size", "breast_size", "id", "height", "weight", "birth_date", "min_price"),
+        Index("ix_girls_listing_min_price", "min_price", "id", "height", "weight", "breast_size", "birth_date"),
+        Index("ix_girls_version", "version"),
+    )
 
 
 class Photo(Base):
@@ -132,8 +145,35 @@ class Photo(Base):
     file_url = Column(String(256), nullable=False)
     order = Column(Integer, nullable=False)
     girl_id = Column(Integer, ForeignKey("girls.id"))
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime)
 
     girl = relationship("Girl", back_populates="photos")
+    variants = relationship(
+        "PhotoVariant", back_populates="photo", order_by="PhotoVariant.width", cascade="all, delete-orphan"
+    )
+
+    __table_args__ = (
+        Index("ix_photos_girl_id_order", "girl_id", "order"),
+        Index("ix_photos_version", "version"),
+    )
+
+
+class PhotoVariant(Base):
+    __tablename__ = "photo_variants"
+
+    id = Column(Integer, primary_key=True)
+    photo_id = Column(Integer, ForeignKey("photos.id"), nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    format = Column(String(8), nullable=False)
+    file_url = Column(String(256), nullable=False)
+
+    photo = relationship("Photo", back_populates="variants")
+
+    __table_args__ = (
+        Index("ix_photo_variants_photo_id_width", "photo_id", "width"),
+    )
 
 
 class Price(Base):
@@ -144,9 +184,16 @@ class Price(Base):
     current_cost = Column(Integer, nullable=False)
     old_cost = Column(Integer)
     girl_id = Column(Integer, ForeignKey("girls.id"))
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime)
 
     girl = relationship("Girl", back_populates="prices")
 
+    __table_args__ = (
+        Index("ix_prices_girl_id_current_cost", "girl_id", "current_cost"),
+        Index("ix_prices_version", "version"),
+    )
+
 
 class GirlService(Base):
     __tablename__ = "girl_services"
@@ -154,10 +201,17 @@ class GirlService(Base):
     girl_id = Column(Integer, ForeignKey("girls.id"), primary_key=True)
     service_id = Column(Integer, ForeignKey("services.id"), primary_key=True)
     additional_cost = Column(Integer)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime)
 
     girl = relationship("Girl", back_populates="services")
     service = relationship("Service", back_populates="girl_services")
 
+    __table_args__ = (
+        Index("ix_girl_services_service_id_girl_id", "service_id", "girl_id"),
+        Index("ix_girl_services_version", "version"),
+    )
+
 
 class Service(Base):
     __tablename__ = "services"
@@ -167,8 +221,10 @@ class Service(Base):
     name_ru = Column(String(32), nullable=False)
     name_en = Column(String(32), nullable=False)
     order = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime)
 
-    girl_services = relationship("GirlService", back_populates="service")
+    girl_services = relationship("GirlService", back_populates="service", cascade="all, delete-orphan")
 
     def get_name(self, lang: Lang) -> str:
         if lang == Lang.UK:
@@ -178,3 +234,159 @@ class Service(Base):
         elif lang == Lang.EN:
             return self.name_en
         return self.name_ua
+
+    __table_args__ = (
+        Index("ix_services_version", "version"),
+    )
+
+
+class ChangeEntity(str, PyEnum):
+    GIRL = "girl"
+    PHOTO = "photo"
+    PRICE = "price"
+    GIRL_SERVICE = "girl_service"
+    SERVICE = "service"
+
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    pruned_version = Column(Integer, nullable=False, default=0)
+    modified_at = Column(DateTime)
+
+
+class Tombstone(Base):
+    __tablename__ = "catalog_tombstones"
+
+    version = Column(Integer, primary_key=True)
+    entity = Column(String(16), nullable=False)
+    entity_id = Column(Integer)
+    girl_id = Column(Integer)
+    service_id = Column(Integer)
+    deleted_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_catalog_tombstones_deleted_at", "deleted_at"),
+    )
+
+
+MIN_PRICE_SQL = (
+    "UPDATE girls SET min_price = "
+    "(SELECT COALESCE(MIN(current_cost), 0) FROM prices WHERE prices.girl_id = {girl_id}) "
+    "WHERE id = {girl_id};"
+)
+
+MIN_PRICE_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS prices_min_price_insert AFTER INSERT ON prices BEGIN "
+    + MIN_PRICE_SQL.format(girl_id="NEW.girl_id") + " END",
+    "CREATE TRIGGER IF NOT EXISTS prices_min_price_update AFTER UPDATE OF current_cost, girl_id ON prices BEGIN "
+    + MIN_PRICE_SQL.format(girl_id="OLD.girl_id") + " "
+    + MIN_PRICE_SQL.format(girl_id="NEW.girl_id") + " END",
+    "CREATE TRIGGER IF NOT EXISTS prices_min_price_delete AFTER DELETE ON prices BEGIN "
+    + MIN_PRICE_SQL.format(girl_id="OLD.girl_id") + " END",
+]
+
+for trigger in MIN_PRICE_TRIGGERS:
+    event.listen(Price.__table__, "after_create", DDL(trigger))
+
+
+FTS_TOKENIZERS = {
+    Lang.UK: "unicode61 remove_diacritics 2",
+    Lang.RU: "unicode61 remove_diacritics 2",
+    Lang.EN: "porter unicode61 remove_diacritics 2",
+}
+
+DESCRIPTION_COLUMNS = {
+    Lang.UK: "description_ua",
+    Lang.RU: "description_ru",
+    Lang.EN: "description_en",
+}
+
+
+def fts_table(lang: Lang) -> str:
+    return f"girls_fts_{lang.value}"
+
+
+def fts_statements(lang: Lang) -> list[str]:
+    table, description = fts_table(lang), DESCRIPTION_COLUMNS[lang]
+    insert_new = f"INSERT INTO {table}(rowid, name, {description}) VALUES (NEW.id, NEW.name, NEW.{description});"
+    delete_old = (
+        f"INSERT INTO {table}({table}, rowid, name, {description}) "
+        f"VALUES ('delete', OLD.id, OLD.name, OLD.{description});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(name, {description}, "
+        f"content='girls', content_rowid='id', tokenize='{FTS_TOKENIZERS[lang]}')",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON girls BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF name, {description} ON girls BEGIN "
+        f"{delete_old} {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON girls BEGIN {delete_old} END",
+    ]
+
+
+FTS_STATEMENTS = [statement for lang in Lang for statement in fts_statements(lang)]
+
+for statement in FTS_STATEMENTS:
+    event.listen(Girl.__table__, "after_create", DDL(statement))
+
+
+CHANGE_TABLES = {
+    ChangeEntity.GIRL: Girl,
+    ChangeEntity.PHOTO: Photo,
+    ChangeEntity.PRICE: Price,
+    ChangeEntity.GIRL_SERVICE: GirlService,
+    ChangeEntity.SERVICE: Service,
+}
+
+TOMBSTONE_KEYS = {
+    ChangeEntity.GIRL: ("OLD.id", "OLD.id", "NULL"),
+    ChangeEntity.PHOTO: ("OLD.id", "OLD.girl_id", "NULL"),
+    ChangeEntity.PRICE: ("OLD.id", "OLD.girl_id", "NULL"),
+    ChangeEntity.GIRL_SERVICE: ("NULL", "OLD.girl_id", "OLD.service_id"),
+    ChangeEntity.SERVICE: ("OLD.id", "NULL", "OLD.id"),
+}
+
+NEXT_VERSION_SQL = "UPDATE catalog_version SET version = version + 1, modified_at = datetime('now') WHERE id = 1;"
+CURRENT_VERSION_SQL = "(SELECT version FROM catalog_version WHERE id = 1)"
+
+
+def change_feed_triggers(entity: ChangeEntity) -> list[str]:
+    table = CHANGE_TABLES[entity].__tablename__
+    stamp = (
+        f"UPDATE {table} SET version = {CURRENT_VERSION_SQL}, updated_at = datetime('now') "
+        f"WHERE rowid = NEW.rowid;"
+    )
+    entity_id, girl_id, service_id = TOMBSTONE_KEYS[entity]
+    tombstone = (
+        "INSERT INTO catalog_tombstones(version, entity, entity_id, girl_id, service_id, deleted_at) "
+        f"VALUES ({CURRENT_VERSION_SQL}, '{entity.value}', {entity_id}, {girl_id}, {service_id}, datetime('now'));"
+    )
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_insert AFTER INSERT ON {table} BEGIN "
+        f"{NEXT_VERSION_SQL} {stamp} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_update AFTER UPDATE ON {table} "
+        f"WHEN NEW.version = OLD.version BEGIN {NEXT_VERSION_SQL} {stamp} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_delete AFTER DELETE ON {table} BEGIN "
+        f"{NEXT_VERSION_SQL} {tombstone} END",
+    ]
+
+
+CHANGE_FEED_STATEMENTS = [
+    "INSERT OR IGNORE INTO catalog_version (id, version, pruned_version, modified_at) VALUES (1, 0, 0, datetime('now'))",
+    *(statement for entity in ChangeEntity for statement in change_feed_triggers(entity)),
+]
+
+for statement in CHANGE_FEED_STATEMENTS:
+    event.listen(Base.metadata, "after_create", DDL(statement))
+
+PHOTO_VARIANT_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS photo_variants_stamp_insert AFTER INSERT ON photo_variants BEGIN "
+    "UPDATE photos SET updated_at = datetime('now') WHERE id = NEW.photo_id; END",
+    "CREATE TRIGGER IF NOT EXISTS photo_variants_stamp_delete AFTER DELETE ON photo_variants BEGIN "
+    "UPDATE photos SET updated_at = datetime('now') WHERE id = OLD.photo_id; END",
+]
+
+for trigger in PHOTO_VARIANT_TRIGGERS:
+    event.listen(Base.metadata, "after_create", DDL(trigger))
@@ -0,0 +1,134 @@
+import hashlib
+import logging
+import sys
+from pathlib import Path, PurePosixPath
+
+from sqlalchemy.orm import Session, selectinload
+
+from application import models
+from application.config import settings
+from application.database import SessionLocal
+from application.search import catalog_index
+from application.services import commit_catalog
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+PHOTOS_DIR = Path("resources/photos")
+PHOTOS_URL = "/photos"
+VARIANTS_URL = "/photos/variants"
+
+FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+class PhotoPipeline:
+    def __init__(self, source_dir: Path, target_dir: Path, widths: list[int], formats: list[str]):
+        if Image is None:
+            raise ImportError("Photo variants require Pillow to be installed")
+        unknown = set(formats) - FORMATS.keys()
+        if unknown:
+            raise ValueError(f"Unsupported photo variant formats: {', '.join(sorted(unknown))}")
+        self.source_dir = source_dir.resolve()
+        self.target_dir = target_dir
+        self.widths = sorted(set(widths))
+        self.formats = formats
+
+    def source_path(self, photo: models.Photo) -> Path | None:
+        try:
+            relative = PurePosixPath(photo.file_url).relative_to(PHOTOS_URL)
+        except ValueError:
+            return None
+        path = (self.source_dir / relative).resolve()
+        if not path.is_relative_to(self.source_dir) or not path.is_file():
+            return None
+        return path
+
+    def generate(self, photo: models.Photo) -> list[models.PhotoVariant]:
+        path = self.source_path(photo)
+        if path is None:
+            logger.warning(f"Photo {photo.id} has no readable source at {photo.file_url}, skipping.")
+            return []
+
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+        variants = []
+        with Image.open(path) as original:
+            image = ImageOps.exif_transpose(original)
+            widths = sorted({min(width, image.width) for width in self.widths})
+            for width in widths:
+                height = max(1, round(image.height * width / image.width))
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                for name in self.formats:
+                    image_format, extension, options = FORMATS[name]
+                    file_name = f"{path.stem}-{digest}-{width}w.{extension}"
+                    target = self.target_dir / file_name
+                    if not target.exists():
+                        converted = resized.convert("RGB") if image_format == "JPEG" else resized
+                        converted.save(target, image_format, **options)
+                    variants.append(models.PhotoVariant(
+                        width=width,
+                        height=height,
+                        format=name,
+                        file_url=f"{VARIANTS_URL}/{file_name}",
+                    ))
+        return variants
+
+    def run(self, db: Session, regenerate: bool = False, batch_size: int = 100) -> int:
+        query = db.query(models.Photo).options(selectinload(models.Photo.variants)).order_by(models.Photo.id)
+        if not regenerate:
+            query = query.filter(~models.Photo.variants.any())
+
+        processed = 0
+        last_id = 0
+        while True:
+            photos = query.filter(models.Photo.id > last_id).limit(batch_size).all()
+            if not photos:
+                break
+            for photo in photos:
+                try:
+                    variants = self.generate(photo)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Photo {photo.id} could not be processed: {e}")
+                    continue
+                if variants:
+                    photo.variants = variants
+                    processed += 1
+            db.commit()
+            last_id = photos[-1].id
+            logger.info(f"Photo variants generated for {processed} photos up to photo {last_id}.")
+
+        if processed:
+            catalog_index.invalidate()
+            commit_catalog(db)
+        return processed
+
+
+def photo_pipeline() -> PhotoPipeline:
+    return PhotoPipeline(
+        source_dir=PHOTOS_DIR,
+        target_dir=Path(settings.PHOTO_VARIANTS_DIR),
+        widths=settings.PHOTO_VARIANT_WIDTHS,
+        formats=settings.PHOTO_VARIANT_FORMATS,
+    )
+
+
+def generate_photo_variants(regenerate: bool = False) -> int:
+    with SessionLocal() as db:
+        return photo_pipeline().run(db, regenerate=regenerate)
+
+
+if __name__ == "__main__":
+    from application.database import engine
+    from application.migrations import migrate
+
+    logging.basicConfig(level=logging.INFO)
+    migrate(engine)
+    count = generate_photo_variants(regenerate="--all" in sys.argv)
+    print(f"Processed {count} photos.")
@@ -0,0 +1,70 @@
+import json
+from typing import Optional
+
+from pydantic import BaseModel
+
+from application import models, schemas
+from application.models import Lang
+
+NESTED_SCHEMAS = {
+    "photos": schemas.Photo,
+    "prices": schemas.Price,
+    "services": schemas.GirlService,
+}
+
+
+def render_girl(girl: models.Girl) -> dict[Lang, bytes]:
+    girl_schema = schemas.Girl.model_validate(girl, from_attributes=True)
+    rendered = {}
+    for lang in Lang:
+        girl_schema.lang = lang
+        for service in girl_schema.services:
+            service.lang = lang
+        rendered[lang] = girl_schema.model_dump_json().encode()
+    return rendered
+
+
+def render_girls_ndjson(girls: list[models.Girl], lang: Lang) -> bytes:
+    lines = []
+    for girl in girls:
+        girl_schema = schemas.Girl.model_validate(girl, from_attributes=True)
+        girl_schema.lang = lang
+        for service in girl_schema.services:
+            service.lang = lang
+        lines.append(girl_schema.model_dump_json().encode() + b"\n")
+    return b"".join(lines)
+
+
+def project(
+    schema: type[BaseModel],
+    girl: models.Girl,
+    attributes: set[str],
+    fields: set[str],
+    lang: Optional[Lang] = None,
+) -> dict:
+    values = {}
+    for name in attributes & schema.model_fields.keys():
+        value = getattr(girl, name)
+        if name in NESTED_SCHEMAS:
+            value = [NESTED_SCHEMAS[name].model_validate(item, from_attributes=True) for item in value]
+            if lang is not None and name == "services":
+                for item in value:
+                    item.lang = lang
+        values[name] = value
+    if lang is not None:
+        values["lang"] = lang
+    return schema.model_construct(**values).model_dump(mode="json", include=fields | {"id"})
+
+
+def render_girl_batch(items: list[bytes], missing: list[int]) -> bytes:
+    return b'{"items":[' + b",".join(items) + b'],"missing":' + json.dumps(missing).encode() + b"}"
+
+
+def render_services(services: list[models.Service]) -> dict[Lang, bytes]:
+    service_schemas = [schemas.Service.model_validate(service, from_attributes=True) for service in services]
+    rendered = {}
+    for lang in Lang:
+        for service_schema in service_schemas:
+            service_schema.lang = lang
+        rendered[lang] = b"[" + b",".join(service_schema.model_dump_json().encode() for service_schema in service_schemas) + b"]"
+    return rendered
@@ -1,17 +1,75 @@
-from typing import List
+import json
+import secrets
+from datetime import date, datetime, time, timezone
+from typing import Awaitable, Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Body as RequestBody, Depends, Header, HTTPException, status, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from application import schemas
-from application.database import get_db
+from application import models, schemas
+from application.cache import catalog_generation, caches, register_cache, TTLCache
+from application.compression import Body, negotiate
+from application.config import settings
+from application.database import ReadSessionLocal, get_read_session, get_session, run_db
+from application.http_cache import is_not_modified, not_modified, validator_headers
+from application.metrics import render_metrics
 from application.models import Lang
-from application.services import GirlService, ServiceService, SortBy
+from application.rendering import project, render_girl, render_girl_batch, render_girls_ndjson, render_services
+from application.search import catalog_index
+from application.services import (
+    AsyncChangeService, AsyncGirlService, AsyncServiceService, CatalogLocked, ChangeService, ChangesUnavailable,
+    GirlService, ServiceMatch, ServiceService, SortBy, InvalidCursor, SORT_ATTRIBUTES, projection,
+)
 
 girl_router = APIRouter(prefix="/girls", tags=["girls"])
 
-@girl_router.get("/", response_model=List[schemas.GirlShort])
-def get_girls(
+listing_cache = register_cache("girls", maxsize=settings.LISTING_CACHE_SIZE, ttl=settings.LISTING_CACHE_TTL)
+rendered_cache = register_cache("rendered", maxsize=settings.RENDERED_CACHE_SIZE, ttl=settings.RENDERED_CACHE_TTL)
+facets_cache = register_cache("facets", maxsize=settings.LISTING_CACHE_SIZE, ttl=settings.LISTING_CACHE_TTL)
+
+
+GIRL_SHORT_LIST = TypeAdapter(List[schemas.GirlShort])
+
+
+def dump_json(content) -> bytes:
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+async def body_response(request: Request, body: Body, headers: dict[str, str]) -> Response:
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if body.needs_compression(encoding):
+        content = await run_in_threadpool(body.encode, encoding)
+    else:
+        content = body.encode(encoding)
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={**headers, **body.headers(encoding)},
+    )
+
+
+async def validated_response(request: Request, body: Body, etag: str, last_modified: datetime) -> Response:
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    return await body_response(request, body, validator_headers(etag, last_modified))
+
+
+def listing_cache_key(filters: dict) -> tuple:
+    key = dict(filters)
+    key["service_ids"] = tuple(sorted(set(filters["service_ids"] or ())))
+    key["service_match"] = filters["service_match"].value
+    if "sort_by" in key:
+        key["sort_by"] = key["sort_by"].value
+    if key.get("cursor") is not None:
+        key["skip"] = 0
+    return tuple(sorted(key.items()))
+
+
+def girl_filters(
         min_age: int = Query(default=18, ge=18, le=80),
         max_age: int = Query(default=80, gt=18, le=80),
         min_height: int = Query(default=150, ge=150, le=200),
@@ -23,14 +81,9 @@ def get_girls(
         min_price: int = Query(default=1000, ge=1000, le=15000),
         max_price: int = Query(default=15000, gt=1000, le=15000),
         service_ids: List[int] = Query(default=None),
-        sort_by: SortBy = Query(default=SortBy.DEFAULT),
-        skip: int = 0,
-        limit: int = 100,
-        db: Session = Depends(get_db)):
-    service = GirlService(db)
-    girls = service.get_girls(
-        skip=skip,
-        limit=limit,
+        match: ServiceMatch = Query(default=ServiceMatch.ANY),
+        q: Optional[str] = Query(default=None, max_length=100)) -> dict:
+    return dict(
         age_min=min_age,
         age_max=max_age,
         height_min=min_height,
@@ -42,45 +95,339 @@ def get_girls(
         price_min=min_price,
         price_max=max_price,
         service_ids=service_ids,
-        sort_by=sort_by
+        service_match=match,
+        q=q,
+    )
+
+
+def export_filters(
+        min_age: Optional[int] = Query(default=None, ge=18, le=80),
+        max_age: Optional[int] = Query(default=None, gt=18, le=80),
+        min_height: Optional[int] = Query(default=None, ge=150, le=200),
+        max_height: Optional[int] = Query(default=None, gt=150, le=200),
+        min_weight: Optional[int] = Query(default=None, ge=40, le=100),
+        max_weight: Optional[int] = Query(default=None, gt=40, le=100),
+        min_breast: Optional[float] = Query(default=None, ge=0.0, le=7.0),
+        max_breast: Optional[float] = Query(default=None, gt=0.0, le=7.0),
+        min_price: Optional[int] = Query(default=None, ge=0, le=15000),
+        max_price: Optional[int] = Query(default=None, gt=0, le=15000),
+        service_ids: List[int] = Query(default=None),
+        match: ServiceMatch = Query(default=ServiceMatch.ANY),
+        q: Optional[str] = Query(default=None, max_length=100)) -> dict:
+    return girl_filters(
+        min_age, max_age, min_height, max_height, min_weight, max_weight,
+        min_breast, max_breast, min_price, max_price, service_ids, match, q,
+    )
+
+
+def parse_fields(fields: Optional[str], schema) -> set[str] | None:
+    if fields is None:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - schemas.serialized_fields(schema)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    return requested or None
+
+
+def render_listing(db: Session, filters: dict, selected: set[str] | None) -> tuple[Body, str | None]:
+    if catalog_index.enabled and filters["q"] is None:
+        girls, next_cursor = catalog_index.search(db, **filters)
+        if selected is not None:
+            return Body(dump_json([girl.model_dump(mode="json", include=selected | {"id"}) for girl in girls])), next_cursor
+        return Body(GIRL_SHORT_LIST.dump_json(girls)), next_cursor
+
+    service = GirlService(db)
+    if selected is None:
+        girls = service.get_girls(**filters)
+        rows = [schemas.GirlShort.model_validate(girl, from_attributes=True) for girl in girls]
+        body = Body(GIRL_SHORT_LIST.dump_json(rows))
+    else:
+        attributes, loaders = projection(selected, extra=SORT_ATTRIBUTES)
+        girls = service.get_girls(loaders=loaders, **filters)
+        body = Body(dump_json([project(schemas.GirlShort, girl, attributes, selected) for girl in girls]))
+    return body, service.next_cursor(girls, filters["limit"], filters["sort_by"], filters["q"])
+
+
+def rendered_bodies(girl: models.Girl) -> dict[Lang, Body]:
+    return {lang: Body(rendered) for lang, rendered in render_girl(girl).items()}
+
+
+def render_profile(db: Session, girl_id: int) -> dict[Lang, Body] | None:
+    girl = GirlService(db).get_girl(girl_id)
+    return rendered_bodies(girl) if girl is not None else None
+
+
+def render_profiles(db: Session, girl_ids: list[int]) -> dict[int, dict[Lang, Body]]:
+    return {girl.id: rendered_bodies(girl) for girl in GirlService(db).get_girls_by_ids(girl_ids)}
+
+
+def render_projection(db: Session, girl_id: int, selected: set[str], lang: Lang) -> Body | None:
+    attributes, loaders = projection(selected, lang=lang)
+    girl = GirlService(db).get_girl(girl_id, loaders=loaders)
+    if girl is None:
+        return None
+    return Body(dump_json(project(schemas.Girl, girl, attributes, selected, lang=lang)))
+
+
+def render_service_list(db: Session) -> dict[Lang, Body]:
+    return {lang: Body(rendered) for lang, rendered in render_services(ServiceService(db).get_services()).items()}
+
+
+@girl_router.get("/", response_model=List[schemas.GirlShort])
+async def get_girls(
+        request: Request,
+        filters: dict = Depends(girl_filters),
+        sort_by: SortBy = Query(default=SortBy.DEFAULT),
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = Query(default=None, description="Comma-separated GirlShort fields to return"),
+        db: Session | AsyncSession = Depends(get_read_session)):
+    selected = parse_fields(fields, schemas.GirlShort)
+    filters = dict(filters, skip=skip, limit=limit, sort_by=sort_by, cursor=cursor)
+    cache_key = listing_cache_key(filters) + (("fields", tuple(sorted(selected or ()))),)
+    generation = catalog_generation.value
+    cached = listing_cache.get(cache_key, generation)
+    if cached is not TTLCache.MISSING:
+        body, next_cursor = cached
+    else:
+        try:
+            body, next_cursor = await run_db(db, render_listing, filters, selected)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        listing_cache.set(cache_key, (body, next_cursor), generation)
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else {}
+    return await body_response(request, body, headers)
+
+
+@girl_router.get("/facets", response_model=schemas.Facets)
+async def get_girl_facets(
+        filters: dict = Depends(girl_filters),
+        db: Session | AsyncSession = Depends(get_read_session)):
+    cache_key = listing_cache_key(filters)
+    generation = catalog_generation.value
+    facets = facets_cache.get(cache_key, generation)
+    if facets is TTLCache.MISSING:
+        facets = await AsyncGirlService(db).get_facets(**filters)
+        facets_cache.set(cache_key, facets, generation)
+    return facets
+
+
+def profile_last_modified(today: date) -> datetime:
+    return max(
+        catalog_generation.modified_at,
+        datetime.combine(today, time.min).astimezone(timezone.utc),
+    )
+
+
+@girl_router.get("/batch", response_model=schemas.GirlBatch)
+async def get_girls_batch(
+    request: Request,
+    ids: List[int] = Query(),
+    lang: Lang = Query(default=Lang.UK),
+    db: Session | AsyncSession = Depends(get_read_session)
+):
+    girl_ids = list(dict.fromkeys(ids))
+    if len(girl_ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BATCH_MAX_IDS} ids can be requested at once",
+        )
+
+    today = date.today()
+    etag = catalog_generation.etag("batch", lang.value, today.isoformat(), ".".join(map(str, girl_ids)))
+    last_modified = profile_last_modified(today)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    generations = {girl_id: catalog_generation.profile(girl_id) for girl_id in girl_ids}
+    bodies = {
+        girl_id: rendered_cache.get(("girl", girl_id, lang, today), generation)
+        for girl_id, generation in generations.items()
+    }
+    misses = [girl_id for girl_id, body in bodies.items() if body is TTLCache.MISSING]
+    if misses:
+        for girl_id, rendered in (await run_db(db, render_profiles, misses)).items():
+            for rendered_lang, rendered_body in rendered.items():
+                rendered_cache.set(("girl", girl_id, rendered_lang, today), rendered_body, generations[girl_id])
+            bodies[girl_id] = rendered[lang]
+
+    items = [bodies[girl_id].raw for girl_id in girl_ids if bodies[girl_id] is not TTLCache.MISSING]
+    missing = [girl_id for girl_id in girl_ids if bodies[girl_id] is TTLCache.MISSING]
+    return await body_response(request, Body(render_girl_batch(items, missing)), validator_headers(etag, last_modified))
+
+
+def export_lines(filters: dict, lang: Lang) -> Iterator[bytes]:
+    with ReadSessionLocal() as db:
+        for girls in GirlService(db).export_girls(settings.EXPORT_BATCH_SIZE, **filters):
+            yield render_girls_ndjson(girls, lang)
+
+
+@girl_router.get("/export", response_class=StreamingResponse)
+async def export_girls(
+    filters: dict = Depends(export_filters),
+    lang: Lang = Query(default=Lang.UK),
+    db: Session | AsyncSession = Depends(get_read_session)
+):
+    catalog = await run_db(db, lambda session: ChangeService(session).get_catalog_version())
+    return StreamingResponse(
+        export_lines(filters, lang),
+        media_type="application/x-ndjson",
+        headers={"X-Catalog-Version": str(catalog.version)},
     )
-    return girls
 
 
 @girl_router.get("/{girl_id}", response_model=schemas.Girl)
-def get_girl(
+async def get_girl(
+    request: Request,
     girl_id: int,
     lang: Lang = Query(default=Lang.UK),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(default=None, description="Comma-separated Girl fields to return"),
+    db: Session | AsyncSession = Depends(get_read_session)
 ):
-    service = GirlService(db)
-    girl = service.get_girl(girl_id)
-    if girl is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Girl not found")
+    selected = parse_fields(fields, schemas.Girl)
+    field_key = ",".join(sorted(selected or ()))
+    today = date.today()
+    etag = catalog_generation.etag("girl", girl_id, lang.value, today.isoformat(), field_key)
+    last_modified = profile_last_modified(today)
+    generation = catalog_generation.profile(girl_id)
+    if selected is not None:
+        cache_key = ("girl", girl_id, lang, today, field_key)
+        body = rendered_cache.get(cache_key, generation)
+        if body is TTLCache.MISSING:
+            body = await run_db(db, render_projection, girl_id, selected, lang)
+            if body is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Girl not found")
+            rendered_cache.set(cache_key, body, generation)
+        return await validated_response(request, body, etag, last_modified)
 
-    girl_schema = schemas.Girl.model_validate(girl, from_attributes=True)
-    girl_schema.lang = lang
+    cache_key = ("girl", girl_id, lang, today)
+    body = rendered_cache.get(cache_key, generation)
+    if body is TTLCache.MISSING:
+        rendered = await run_db(db, render_profile, girl_id)
+        if rendered is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Girl not found")
+        for rendered_lang, rendered_body in rendered.items():
+            rendered_cache.set(("girl", girl_id, rendered_lang, today), rendered_body, generation)
+        body = rendered[lang]
 
-    for service in girl_schema.services:
-        service.lang = lang
-
-    return girl_schema
+    return await validated_response(request, body, etag, last_modified)
 
 
 service_router = APIRouter(prefix="/services", tags=["services"])
 
 @service_router.get("/", response_model=List[schemas.Service])
-def get_services(
+async def get_services(
+    request: Request,
     lang: Lang = Lang.UK,
-    db: Session = Depends(get_db)
+    db: Session | AsyncSession = Depends(get_read_session)
+):
+    etag = catalog_generation.etag("services", lang.value)
+    last_modified = catalog_generation.modified_at
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    generation = catalog_generation.profile_value
+    body = rendered_cache.get(("services", lang), generation)
+    if body is TTLCache.MISSING:
+        rendered = await run_db(db, render_service_list)
+        for rendered_lang, rendered_body in rendered.items():
+            rendered_cache.set(("services", rendered_lang), rendered_body, generation)
+        body = rendered[lang]
+
+    return await body_response(request, body, validator_headers(etag, last_modified))
+
+
+change_router = APIRouter(prefix="/changes", tags=["changes"])
+
+@change_router.get("/", response_model=schemas.ChangeFeed)
+async def get_changes(
+    since: int = Query(default=0, ge=0),
+    limit: int = Query(default=settings.CHANGES_PAGE_SIZE, ge=1, le=settings.CHANGES_MAX_PAGE_SIZE),
+    db: Session | AsyncSession = Depends(get_read_session)
+):
+    try:
+        return await AsyncChangeService(db).get_changes(since, limit)
+    except ChangesUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(e))
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(default=None)):
+    if (
+        not settings.ADMIN_TOKEN
+        or x_admin_token is None
+        or not secrets.compare_digest(x_admin_token.encode(), settings.ADMIN_TOKEN.encode())
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+def check_batch_size(items: list):
+    if len(items) > settings.ADMIN_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.ADMIN_BATCH_MAX_ITEMS} items can be written at once",
+        )
+
+
+async def bulk_result(write: Awaitable[list[schemas.BulkItemResult]]) -> schemas.BulkResult:
+    try:
+        return schemas.BulkResult(items=await write)
+    except CatalogLocked as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+
+
+admin_router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin_token)])
+
+@admin_router.put("/girls", response_model=schemas.BulkResult)
+async def upsert_girls(
+    girls: List[schemas.GirlUpsert],
+    db: Session | AsyncSession = Depends(get_session)
+):
+    check_batch_size(girls)
+    return await bulk_result(AsyncGirlService(db).upsert_girls(girls))
+
+
+@admin_router.delete("/girls", response_model=schemas.BulkResult)
+async def delete_girls(
+    ids: List[int] = RequestBody(),
+    db: Session | AsyncSession = Depends(get_session)
+):
+    check_batch_size(ids)
+    return await bulk_result(AsyncGirlService(db).delete_girls(ids))
+
+
+@admin_router.put("/services", response_model=schemas.BulkResult)
+async def upsert_services(
+    services: List[schemas.ServiceUpsert],
+    db: Session | AsyncSession = Depends(get_session)
+):
+    check_batch_size(services)
+    return await bulk_result(AsyncServiceService(db).upsert_services(services))
+
+
+@admin_router.delete("/services", response_model=schemas.BulkResult)
+async def delete_services(
+    ids: List[int] = RequestBody(),
+    db: Session | AsyncSession = Depends(get_session)
 ):
-    service = ServiceService(db)
-    services = service.get_services()
+    check_batch_size(ids)
+    return await bulk_result(AsyncServiceService(db).delete_services(ids))
+
+
+cache_router = APIRouter(prefix="/cache", tags=["cache"])
+
+@cache_router.get("/stats")
+async def get_cache_stats():
+    return {name: cache.stats() for name, cache in caches.items()}
+
 
-    service_schemas = []
-    for service in services:
-        service_schema = schemas.Service.model_validate(service, from_attributes=True)
-        service_schema.lang = lang
-        service_schemas.append(service_schema)
+metrics_router = APIRouter(tags=["metrics"])
 
-    return service_schemas
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
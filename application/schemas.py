@@ -1,9 +1,14 @@
-from datetime import date
-from typing import Optional, List
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Optional, List
 
-from pydantic import BaseModel, computed_field, Field
+from pydantic import BaseModel, computed_field, Field, model_validator
 
-from .models import HairColor, Ethnicity, BodyType, BreastType, Lang
+from .models import HairColor, Ethnicity, BodyType, BreastType, ChangeEntity, Lang
+
+
+def serialized_fields(model: type[BaseModel]) -> set[str]:
+    return {name for name, field in model.model_fields.items() if not field.exclude} | set(model.model_computed_fields)
 
 
 def calculate_age(birth_date: date) -> int:
@@ -47,9 +52,20 @@ class PhotoCreate(PhotoBase):
     girl_id: int
 
 
+class PhotoVariant(BaseModel):
+    width: int
+    height: int
+    format: str
+    file_url: str
+
+    class Config:
+        from_attributes = True
+
+
 class Photo(PhotoBase):
     id: int = Field(exclude=True)
     girl_id: int = Field(exclude=True)
+    variants: List[PhotoVariant] = []
 
     class Config:
         from_attributes = True
@@ -131,6 +147,50 @@ class GirlServiceCreate(GirlServiceBase):
     pass
 
 
+MAX_ID = 2**63 - 1
+MAX_COST = 1_000_000
+MAX_ORDER = 10_000
+
+
+class PhotoUpsert(PhotoBase):
+    order: int = Field(ge=0, le=MAX_ORDER)
+
+
+class PriceUpsert(PriceBase):
+    hours: int = Field(ge=1, le=168)
+    current_cost: int = Field(ge=0, le=MAX_COST)
+    old_cost: Optional[int] = Field(default=None, ge=0, le=MAX_COST)
+
+
+class GirlServiceUpsert(BaseModel):
+    service_id: int = Field(ge=1, le=MAX_ID)
+    additional_cost: Optional[int] = Field(default=None, ge=0, le=MAX_COST)
+
+
+class GirlUpsert(GirlCreate):
+    id: Optional[int] = Field(default=None, ge=1, le=MAX_ID)
+    height: int = Field(ge=100, le=250)
+    weight: int = Field(ge=30, le=250)
+    breast_size: float = Field(ge=0.0, le=20.0)
+    photos: List[PhotoUpsert] = []
+    prices: List[PriceUpsert] = []
+    services: List[GirlServiceUpsert] = []
+
+    @model_validator(mode="after")
+    def check_unique_children(self):
+        for collection, key in (("photos", "file_url"), ("prices", "hours"), ("services", "service_id")):
+            values = [getattr(child, key) for child in getattr(self, collection)]
+            duplicates = sorted({value for value in values if values.count(value) > 1}, key=str)
+            if duplicates:
+                raise ValueError(f"Duplicate {collection} {key}: {', '.join(map(str, duplicates))}")
+        return self
+
+
+class ServiceUpsert(ServiceCreate):
+    id: Optional[int] = Field(default=None, ge=1, le=MAX_ID)
+    order: int = Field(ge=0, le=MAX_ORDER)
+
+
 class Girl(GirlBase):
     id: int
     birth_date: date = Field(exclude=True)
@@ -202,6 +262,12 @@ class GirlShort(BaseModel):
             return self.photos[0].file_url
         return None
 
+    @computed_field
+    def main_photo_variants(self) -> List[PhotoVariant]:
+        if self.photos:
+            return self.photos[0].variants
+        return []
+
     @computed_field
     def min_price(self) -> Optional[int]:
         if self.prices:
@@ -210,3 +276,55 @@ class GirlShort(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class GirlBatch(BaseModel):
+    items: List[Girl]
+    missing: List[int]
+
+
+class Facets(BaseModel):
+    total: int
+    hair_color: dict[HairColor, int] = {}
+    ethnicity: dict[Ethnicity, int] = {}
+    body_type: dict[BodyType, int] = {}
+    breast_type: dict[BreastType, int] = {}
+    services: dict[int, int] = {}
+    price: dict[int, int] = {}
+
+
+class BulkStatus(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    NOT_FOUND = "not_found"
+    FAILED = "failed"
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: BulkStatus
+    detail: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    items: List[BulkItemResult]
+
+
+class Change(BaseModel):
+    version: int
+    entity: ChangeEntity
+    id: Optional[int] = None
+    girl_id: Optional[int] = None
+    service_id: Optional[int] = None
+    deleted: bool = False
+    updated_at: Optional[datetime] = None
+    data: Optional[dict[str, Any]] = None
+
+
+class ChangeFeed(BaseModel):
+    changes: List[Change]
+    next_since: int
+    has_more: bool
+    version: int
@@ -0,0 +1,233 @@
+import logging
+import threading
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session, selectinload
+
+from application import models, schemas
+from application.config import settings
+from application.services import GIRL_SHORT_LOADERS, SORT_COLUMNS, ServiceMatch, SortBy, decode_cursor, encode_cursor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+CATALOG_LOADERS = GIRL_SHORT_LOADERS + (selectinload(models.Girl.services),)
+
+
+class CatalogSnapshot:
+    def __init__(self, ids, birth_date, height, weight, breast_size, min_price, services, rows):
+        self.ids = ids
+        self.birth_date = birth_date
+        self.height = height
+        self.weight = weight
+        self.breast_size = breast_size
+        self.min_price = min_price
+        self.services = services
+        self.rows = rows
+        self.orders = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_girls(cls, girls: list[models.Girl]) -> "CatalogSnapshot":
+        ids = np.fromiter((girl.id for girl in girls), dtype=np.int64, count=len(girls))
+        services = {}
+        for row, girl in enumerate(girls):
+            for girl_service in girl.services:
+                if girl_service.service_id not in services:
+                    services[girl_service.service_id] = np.zeros(len(girls), dtype=bool)
+                services[girl_service.service_id][row] = True
+        return cls(
+            ids=ids,
+            birth_date=np.fromiter((girl.birth_date.toordinal() for girl in girls), dtype=np.int32, count=len(girls)),
+            height=np.fromiter((girl.height for girl in girls), dtype=np.int32, count=len(girls)),
+            weight=np.fromiter((girl.weight for girl in girls), dtype=np.int32, count=len(girls)),
+            breast_size=np.fromiter((girl.breast_size for girl in girls), dtype=np.float64, count=len(girls)),
+            min_price=np.fromiter((girl.min_price for girl in girls), dtype=np.int64, count=len(girls)),
+            services=services,
+            rows=[schemas.GirlShort.model_validate(girl, from_attributes=True) for girl in girls],
+        )
+
+    def patch(self, girls: list[models.Girl], girl_ids: set[int]) -> "CatalogSnapshot":
+        keep = ~np.isin(self.ids, np.fromiter(girl_ids, dtype=np.int64, count=len(girl_ids)))
+        added = CatalogSnapshot.from_girls(girls)
+        services = {}
+        for service_id in self.services.keys() | added.services.keys():
+            services[service_id] = np.concatenate([
+                self.services.get(service_id, np.zeros(len(self.ids), dtype=bool))[keep],
+                added.services.get(service_id, np.zeros(len(added.ids), dtype=bool)),
+            ])
+        return CatalogSnapshot(
+            ids=np.concatenate([self.ids[keep], added.ids]),
+            birth_date=np.concatenate([self.birth_date[keep], added.birth_date]),
+            height=np.concatenate([self.height[keep], added.height]),
+            weight=np.concatenate([self.weight[keep], added.weight]),
+            breast_size=np.concatenate([self.breast_size[keep], added.breast_size]),
+            min_price=np.concatenate([self.min_price[keep], added.min_price]),
+            services=services,
+            rows=[row for row, kept in zip(self.rows, keep) if kept] + added.rows,
+        )
+
+    def column(self, name: str):
+        return getattr(self, name) if name else self.ids
+
+    def order(self, name: str):
+        if name not in self.orders:
+            with self.lock:
+                if name not in self.orders:
+                    self.orders[name] = np.lexsort((self.ids, self.column(name)))
+        return self.orders[name]
+
+
+class CatalogIndex:
+    def __init__(self, enabled: bool):
+        if enabled and np is None:
+            raise ImportError("SEARCH_ENGINE=memory requires numpy to be installed")
+        self.enabled = enabled
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self.pending: set[int] = set()
+        self.lock = threading.Lock()
+
+    def invalidate(self, girl_ids: Optional[set[int]] = None):
+        with self.lock:
+            if girl_ids is None:
+                self.snapshot = None
+            else:
+                self.pending |= girl_ids
+
+    def refresh(self, db: Session) -> CatalogSnapshot:
+        with self.lock:
+            if self.snapshot is None:
+                girls = db.query(models.Girl).options(*CATALOG_LOADERS).all()
+                self.snapshot = CatalogSnapshot.from_girls(girls)
+                self.pending.clear()
+                logger.info(f"Catalog index built with {len(girls)} girls.")
+            elif self.pending:
+                girl_ids, self.pending = self.pending, set()
+                girls = (
+                    db.query(models.Girl)
+                    .options(*CATALOG_LOADERS)
+                    .filter(models.Girl.id.in_(girl_ids))
+                    .all()
+                )
+                self.snapshot = self.snapshot.patch(girls, girl_ids)
+            return self.snapshot
+
+    def search(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        age_min: Optional[int] = None,
+        age_max: Optional[int] = None,
+        height_min: Optional[int] = None,
+        height_max: Optional[int] = None,
+        weight_min: Optional[int] = None,
+        weight_max: Optional[int] = None,
+        breast_min: Optional[float] = None,
+        breast_max: Optional[float] = None,
+        price_min: Optional[int] = None,
+        price_max: Optional[int] = None,
+        service_ids: Optional[list[int]] = None,
+        service_match: ServiceMatch = ServiceMatch.ANY,
+        q: Optional[str] = None,
+        sort_by: SortBy = SortBy.DEFAULT,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[schemas.GirlShort], str | None]:
+        if q is not None:
+            raise ValueError("Text search is served by SQL, not the catalog index")
+        snapshot = self.refresh(db)
+        mask = np.ones(len(snapshot.ids), dtype=bool)
+
+        if age_min is not None:
+            mask &= snapshot.birth_date <= (date.today() - timedelta(days=age_min * 365)).toordinal()
+        if age_max is not None:
+            mask &= snapshot.birth_date >= (date.today() - timedelta(days=age_max * 365)).toordinal()
+        if height_min is not None:
+            mask &= snapshot.height >= height_min
+        if height_max is not None:
+            mask &= snapshot.height <= height_max
+        if weight_min is not None:
+            mask &= snapshot.weight >= weight_min
+        if weight_max is not None:
+            mask &= snapshot.weight <= weight_max
+        if breast_min is not None:
+            mask &= snapshot.breast_size >= breast_min
+        if breast_max is not None:
+            mask &= snapshot.breast_size <= breast_max
+        if price_min is not None:
+            mask &= snapshot.min_price >= price_min
+        if price_max is not None:
+            mask &= snapshot.min_price <= price_max
+
+        if service_ids:
+            empty = np.zeros(len(snapshot.ids), dtype=bool)
+            postings = [snapshot.services.get(service_id, empty) for service_id in set(service_ids)]
+            if service_match == ServiceMatch.ALL:
+                mask &= np.logical_and.reduce(postings)
+            else:
+                mask &= np.logical_or.reduce(postings)
+
+        sort_column, descending = SORT_COLUMNS.get(sort_by, (None, False))
+        name = sort_column.key if sort_column is not None else None
+        keys = snapshot.column(name)
+
+        if cursor is not None:
+            last_value, last_id = decode_cursor(cursor, sort_by)
+            if isinstance(last_value, date):
+                last_value = last_value.toordinal()
+            if descending:
+                mask &= (keys < last_value) | ((keys == last_value) & (snapshot.ids < last_id))
+            else:
+                mask &= (keys > last_value) | ((keys == last_value) & (snapshot.ids > last_id))
+            skip = 0
+
+        order = snapshot.order(name)
+        if descending:
+            order = order[::-1]
+        page = order[mask[order]][skip:skip + limit]
+
+        next_cursor = None
+        if len(page) and len(page) == limit:
+            last = page[-1]
+            last_value = keys[last].item()
+            if name == models.Girl.birth_date.key:
+                last_value = date.fromordinal(last_value)
+            next_cursor = encode_cursor(sort_by, last_value, int(snapshot.ids[last]))
+
+        return [snapshot.rows[row] for row in page], next_cursor
+
+
+catalog_index = CatalogIndex(enabled=settings.SEARCH_ENGINE == "memory")
+
+
+def _mark_changed(target):
+    session = object_session(target)
+    if session is None:
+        return
+    girl_id = target.id if isinstance(target, models.Girl) else target.girl_id
+    if girl_id is not None:
+        session.info.setdefault("catalog_changed", set()).add(girl_id)
+
+
+def _after_commit(session: Session):
+    changed = session.info.pop("catalog_changed", None)
+    if changed:
+        catalog_index.invalidate(changed)
+
+
+def _after_rollback(session: Session):
+    session.info.pop("catalog_changed", None)
+
+
+if catalog_index.enabled:
+    for model in (models.Girl, models.Photo, models.Price, models.GirlService):
+        for mapper_event in ("after_insert", "after_update", "after_delete"):
+            event.listen(model, mapper_event, lambda mapper, connection, target: _mark_changed(target))
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
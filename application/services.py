@@ -1,10 +1,19 @@
-from datetime import date, timedelta
+import base64
+import json
+import re
+from datetime import date, datetime, timedelta, timezone
 from enum import Enum
-from typing import Optional
+from functools import wraps
+from typing import Any, Iterator, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import String, column, func, literal, literal_column, null, select, table, tuple_, type_coerce, union_all
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import Session, Query, selectinload, load_only
 
 from application import models, schemas
+from application.cache import catalog_generation
+from application.config import settings
+from application.database import run_db
 from application.models import Girl
 
 
@@ -20,14 +29,246 @@ class SortBy(str, Enum):
     BUST_DOWN = "bust_down"
 
 
+GIRL_SHORT_LOADERS = (
+    selectinload(models.Girl.photos).selectinload(models.Photo.variants),
+    selectinload(models.Girl.prices),
+)
+
+GIRL_LOADERS = (
+    selectinload(models.Girl.photos).selectinload(models.Photo.variants),
+    selectinload(models.Girl.prices),
+    selectinload(models.Girl.services).joinedload(models.GirlService.service),
+)
+
+RELATIONSHIP_LOADERS = {
+    "photos": selectinload(models.Girl.photos).selectinload(models.Photo.variants),
+    "prices": selectinload(models.Girl.prices),
+    "services": selectinload(models.Girl.services).joinedload(models.GirlService.service),
+}
+
+FIELD_ATTRIBUTES = {
+    "age": ("birth_date",),
+    "hair_color_localized": ("hair_color",),
+    "ethnicity_localized": ("ethnicity",),
+    "body_type_localized": ("body_type",),
+    "breast_type_localized": ("breast_type",),
+    "main_photo": ("photos",),
+    "main_photo_variants": ("photos",),
+    "min_price": ("prices",),
+}
+
+
+def projection(fields: set[str], lang: Optional[models.Lang] = None, extra: tuple[str, ...] = ()) -> tuple[set[str], tuple]:
+    attributes = {"id", *extra}
+    for field in fields:
+        if field == "description_localized":
+            attributes.add(models.DESCRIPTION_COLUMNS[lang])
+        else:
+            attributes.update(FIELD_ATTRIBUTES.get(field, (field,)))
+    columns = [getattr(models.Girl, name) for name in attributes if name not in RELATIONSHIP_LOADERS]
+    loaders = (load_only(*columns),) + tuple(
+        loader for name, loader in RELATIONSHIP_LOADERS.items() if name in attributes
+    )
+    return attributes, loaders
+
+
+class ServiceMatch(str, Enum):
+    ANY = "any"
+    ALL = "all"
+
+
+SORT_COLUMNS = {
+    SortBy.PRICE_UP: (models.Girl.min_price, False),
+    SortBy.PRICE_DOWN: (models.Girl.min_price, True),
+    SortBy.AGE_UP: (models.Girl.birth_date, True),
+    SortBy.AGE_DOWN: (models.Girl.birth_date, False),
+    SortBy.WEIGHT_UP: (models.Girl.weight, False),
+    SortBy.WEIGHT_DOWN: (models.Girl.weight, True),
+    SortBy.BUST_UP: (models.Girl.breast_size, False),
+    SortBy.BUST_DOWN: (models.Girl.breast_size, True),
+}
+
+
+FACET_ENUMS = {
+    "hair_color": models.HairColor,
+    "ethnicity": models.Ethnicity,
+    "body_type": models.BodyType,
+    "breast_type": models.BreastType,
+}
+
+
+SEARCH_TOKEN = re.compile(r"\w+")
+
+SORT_ATTRIBUTES = tuple(column.key for column, _ in SORT_COLUMNS.values())
+
+
+class ChangesUnavailable(ValueError):
+    pass
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CatalogLocked(RuntimeError):
+    pass
+
+
+def search_expression(q: Optional[str]) -> str | None:
+    tokens = SEARCH_TOKEN.findall(q or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_matches(expression: str):
+    selects = []
+    for lang in models.Lang:
+        fts = table(models.fts_table(lang), column("rowid"))
+        fts_column = literal_column(fts.name)
+        selects.append(
+            select(fts.c.rowid.label("girl_id"), func.bm25(fts_column, 10.0, 1.0).label("rank"))
+            .select_from(fts)
+            .where(fts_column.match(expression))
+        )
+    return union_all(*selects).subquery("search_matches")
+
+
+def sync_collection(collection: list, items: list, key: str, model: type):
+    wanted = {getattr(item, key): item.model_dump() for item in items}
+    current = {}
+    for child in list(collection):
+        value = getattr(child, key)
+        if value in wanted and value not in current:
+            current[value] = child
+        else:
+            collection.remove(child)
+    for value, data in wanted.items():
+        child = current.get(value)
+        if child is None:
+            collection.append(model(**data))
+            continue
+        for attribute, attribute_value in data.items():
+            if getattr(child, attribute) != attribute_value:
+                setattr(child, attribute, attribute_value)
+
+
+def bulk_failure(index: int, item_id: Optional[int], error: Exception | str) -> schemas.BulkItemResult:
+    detail = str(getattr(error, "orig", None) or error)
+    return schemas.BulkItemResult(index=index, id=item_id, status=schemas.BulkStatus.FAILED, detail=detail)
+
+
+BULK_ITEM_ERRORS = (SQLAlchemyError, OverflowError, ValueError)
+
+
+def is_lock_error(error: Exception) -> bool:
+    return isinstance(error, OperationalError) and "locked" in str(error.orig)
+
+
+def locked_write(method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            self.db.connection(execution_options={"sqlite_immediate": True})
+            return method(self, *args, **kwargs)
+        except OperationalError as e:
+            if not is_lock_error(e):
+                raise
+            self.db.rollback()
+            raise CatalogLocked("The catalog is being written by another request, retry shortly") from e
+    return wrapper
+
+
+def apply_bulk(db: Session, items: list[tuple[int, Optional[int], Any]], write) -> list[schemas.BulkItemResult]:
+    try:
+        with db.begin_nested():
+            written = [(index, *write(item)) for index, _, item in items]
+    except BULK_ITEM_ERRORS as e:
+        if is_lock_error(e):
+            raise
+        written = None
+
+    results = []
+    if written is None:
+        written = []
+        for index, item_id, item in items:
+            try:
+                with db.begin_nested():
+                    row, status = write(item)
+            except BULK_ITEM_ERRORS as e:
+                if is_lock_error(e):
+                    raise
+                results.append(bulk_failure(index, item_id, e))
+                continue
+            written.append((index, row, status))
+    results += [schemas.BulkItemResult(index=index, id=row.id, status=status) for index, row, status in written]
+    return results
+
+
+def commit_catalog(db: Session, girl_ids: Optional[set[int]] = None):
+    db.flush()
+    catalog = ChangeService(db).get_catalog_version()
+    version, modified_at = catalog.version, catalog.modified_at
+    db.commit()
+    catalog_generation.bump(girl_ids, version, modified_at)
+
+
+def encode_cursor(sort_by: SortBy, value, girl_id: int) -> str:
+    if isinstance(value, date):
+        value = value.isoformat()
+    payload = json.dumps([sort_by.value, value, girl_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: SortBy) -> tuple:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort_by, value, girl_id = json.loads(payload)
+        if cursor_sort_by != sort_by.value:
+            raise InvalidCursor("Cursor was issued for a different sort order")
+        if not isinstance(girl_id, int) or isinstance(girl_id, bool):
+            raise InvalidCursor("Malformed cursor")
+        if sort_by in (SortBy.AGE_UP, SortBy.AGE_DOWN):
+            value = date.fromisoformat(value)
+        elif not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise InvalidCursor("Malformed cursor")
+        return value, girl_id
+    except InvalidCursor:
+        raise
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+
+
 class GirlService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_girls(
-        self,
-        skip: int = 0,
-        limit: int = 100,
+    @staticmethod
+    def sort_key(girl: models.Girl, sort_by: SortBy):
+        if sort_by in (SortBy.PRICE_UP, SortBy.PRICE_DOWN):
+            return girl.min_price
+        elif sort_by in (SortBy.AGE_UP, SortBy.AGE_DOWN):
+            return girl.birth_date
+        elif sort_by in (SortBy.WEIGHT_UP, SortBy.WEIGHT_DOWN):
+            return girl.weight
+        elif sort_by in (SortBy.BUST_UP, SortBy.BUST_DOWN):
+            return girl.breast_size
+        return girl.id
+
+    @staticmethod
+    def is_ranked(sort_by: SortBy, q: Optional[str]) -> bool:
+        return sort_by == SortBy.DEFAULT and search_expression(q) is not None
+
+    @staticmethod
+    def next_cursor(girls: list[models.Girl], limit: int, sort_by: SortBy, q: Optional[str] = None) -> str | None:
+        if not girls or len(girls) < limit or GirlService.is_ranked(sort_by, q):
+            return None
+        last = girls[-1]
+        return encode_cursor(sort_by, GirlService.sort_key(last, sort_by), last.id)
+
+    @staticmethod
+    def filter_girls(
+        query: Query,
         age_min: Optional[int] = None,
         age_max: Optional[int] = None,
         height_min: Optional[int] = None,
@@ -39,83 +280,150 @@ class GirlService:
         price_min: Optional[int] = None,
         price_max: Optional[int] = None,
         service_ids: Optional[list[int]] = None,
-        sort_by: SortBy = SortBy.DEFAULT,
-    ) -> list[type[Girl]]:
-
-        query = self.db.query(models.Girl)
-
+        service_match: ServiceMatch = ServiceMatch.ANY,
+        q: Optional[str] = None,
+    ) -> Query:
+        # Listing ranges usually keep most of the catalog; likely() stops SQLite
+        # from picking a range index over the one that serves the ORDER BY.
         if age_min is not None:
             max_birth_date = date.today() - timedelta(days=age_min * 365)
-            query = query.filter(models.Girl.birth_date <= max_birth_date)
+            query = query.filter(func.likely(models.Girl.birth_date <= max_birth_date))
         if age_max is not None:
             min_birth_date = date.today() - timedelta(days=age_max * 365)
-            query = query.filter(models.Girl.birth_date >= min_birth_date)
+            query = query.filter(func.likely(models.Girl.birth_date >= min_birth_date))
 
         if height_min is not None:
-            query = query.filter(models.Girl.height >= height_min)
+            query = query.filter(func.likely(models.Girl.height >= height_min))
         if height_max is not None:
-            query = query.filter(models.Girl.height <= height_max)
+            query = query.filter(func.likely(models.Girl.height <= height_max))
 
         if weight_min is not None:
-            query = query.filter(models.Girl.weight >= weight_min)
+            query = query.filter(func.likely(models.Girl.weight >= weight_min))
         if weight_max is not None:
-            query = query.filter(models.Girl.weight <= weight_max)
+            query = query.filter(func.likely(models.Girl.weight <= weight_max))
 
         if breast_min is not None:
-            query = query.filter(models.Girl.breast_size >= breast_min)
+            query = query.filter(func.likely(models.Girl.breast_size >= breast_min))
         if breast_max is not None:
-            query = query.filter(models.Girl.breast_size <= breast_max)
-
-        if service_ids:
-            query = query.join(models.GirlService).filter(models.GirlService.service_id.in_(service_ids))
-
-        if sort_by == SortBy.AGE_UP:
-            query = query.order_by(models.Girl.birth_date.desc())
-        elif sort_by == SortBy.AGE_DOWN:
-            query = query.order_by(models.Girl.birth_date.asc())
-        elif sort_by == SortBy.WEIGHT_UP:
-            query = query.order_by(models.Girl.weight.asc())
-        elif sort_by == SortBy.WEIGHT_DOWN:
-            query = query.order_by(models.Girl.weight.desc())
-        elif sort_by == SortBy.BUST_UP:
-            query = query.order_by(models.Girl.breast_size.asc())
-        elif sort_by == SortBy.BUST_DOWN:
-            query = query.order_by(models.Girl.breast_size.desc())
-        else:
-            query = query.order_by(models.Girl.id.asc())
-
-        girls = query.offset(skip).limit(limit).all()
+            query = query.filter(func.likely(models.Girl.breast_size <= breast_max))
 
         if price_min is not None:
-            girls_price_min = []
-            for girl in girls:
-                if girl.min_price >= price_min:
-                    girls_price_min.append(girl)
-            girls = girls_price_min
-
+            query = query.filter(func.likely(models.Girl.min_price >= price_min))
         if price_max is not None:
-            girls_price_max = []
-            for girl in girls:
-                if girl.min_price <= price_max:
-                    girls_price_max.append(girl)
-            girls = girls_price_max
+            query = query.filter(func.likely(models.Girl.min_price <= price_max))
 
-        if sort_by == SortBy.PRICE_UP:
-            girls.sort(key=lambda x: x.min_price)
-
-        elif sort_by == SortBy.PRICE_DOWN:
-            girls.sort(key=lambda x: x.min_price, reverse=True)
+        # Correlated primary key probes keep the listing on its sort index
+        # instead of sorting every girl that offers the services.
+        if service_ids:
+            service_ids = sorted(set(service_ids))
+            offers = select(models.GirlService.girl_id).where(models.GirlService.girl_id == models.Girl.id)
+            if service_match == ServiceMatch.ALL:
+                for service_id in service_ids:
+                    query = query.filter(offers.where(models.GirlService.service_id == service_id).exists())
+            else:
+                query = query.filter(offers.where(models.GirlService.service_id.in_(service_ids)).exists())
 
-        return girls
+        expression = search_expression(q)
+        if expression is not None:
+            query = query.filter(models.Girl.id.in_(select(search_matches(expression).c.girl_id)))
 
+        return query
 
-    def get_girl(self, girl_id: int) -> models.Girl | None:
-        return self.db.query(models.Girl).filter(models.Girl.id == girl_id).first()
+    def girls_query(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        sort_by: SortBy = SortBy.DEFAULT,
+        cursor: Optional[str] = None,
+        loaders: tuple = GIRL_SHORT_LOADERS,
+        **filters,
+    ) -> Query:
+        query = self.db.query(models.Girl).options(*loaders)
+        sort_column, descending = SORT_COLUMNS.get(sort_by, (None, False))
+
+        if self.is_ranked(sort_by, filters.get("q")):
+            if cursor is not None:
+                raise InvalidCursor("Cursors are not available for relevance-ranked search, use skip")
+            matches = search_matches(search_expression(filters["q"]))
+            ranked = (
+                select(matches.c.girl_id, func.min(matches.c.rank).label("rank"))
+                .group_by(matches.c.girl_id)
+                .subquery("ranked")
+            )
+            query = query.join(ranked, ranked.c.girl_id == models.Girl.id)
+            query = self.filter_girls(query, **dict(filters, q=None))
+            return query.order_by(ranked.c.rank, models.Girl.id).offset(skip).limit(limit)
+
+        # The keyset condition goes first so SQLite seeks the sort index with it.
+        if cursor is not None:
+            last_value, last_id = decode_cursor(cursor, sort_by)
+            if sort_column is None:
+                query = query.filter(models.Girl.id > last_id)
+            else:
+                sort_key = tuple_(sort_column, models.Girl.id)
+                query = query.filter(sort_key < (last_value, last_id) if descending else sort_key > (last_value, last_id))
+            skip = 0
+
+        query = self.filter_girls(query, **filters)
+
+        if sort_column is None:
+            query = query.order_by(models.Girl.id.asc())
+        elif descending:
+            query = query.order_by(sort_column.desc(), models.Girl.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), models.Girl.id.asc())
+
+        return query.offset(skip).limit(limit)
+
+    def get_girls(self, **filters) -> list[type[Girl]]:
+        return self.girls_query(**filters).all()
+
+    def get_facets(self, **filters) -> dict:
+        columns = [models.Girl.id, models.Girl.min_price] + [getattr(models.Girl, name) for name in FACET_ENUMS]
+        matched = self.filter_girls(self.db.query(*columns), **filters).cte("matched")
+        bucket = matched.c.min_price // settings.FACET_PRICE_BUCKET * settings.FACET_PRICE_BUCKET
+        girl_services = models.GirlService.__table__
+
+        # Raw stored values for every facet; enum names are mapped back below.
+        statement = union_all(
+            select(literal("total"), type_coerce(null(), String), func.count()).select_from(matched),
+            *(
+                select(literal(name), type_coerce(matched.c[name], String), func.count()).group_by(matched.c[name])
+                for name in FACET_ENUMS
+            ),
+            select(literal("services"), type_coerce(girl_services.c.service_id, String), func.count())
+            .select_from(matched.join(girl_services, girl_services.c.girl_id == matched.c.id))
+            .group_by(girl_services.c.service_id),
+            select(literal("price"), type_coerce(bucket, String), func.count()).group_by(bucket),
+        )
+
+        facets = {"total": 0, "services": {}, "price": {}, **{name: {} for name in FACET_ENUMS}}
+        for facet, value, count in self.db.execute(statement):
+            if facet == "total":
+                facets["total"] = count
+            elif facet in FACET_ENUMS:
+                facets[facet][FACET_ENUMS[facet][value]] = count
+            else:
+                facets[facet][int(value)] = count
+        return facets
+
+
+    def get_girl(self, girl_id: int, loaders: tuple = GIRL_LOADERS) -> models.Girl | None:
+        return self.db.query(models.Girl).options(*loaders).filter(models.Girl.id == girl_id).first()
+
+    def get_girls_by_ids(self, girl_ids: list[int], loaders: tuple = GIRL_LOADERS) -> list[models.Girl]:
+        return self.db.query(models.Girl).options(*loaders).filter(models.Girl.id.in_(girl_ids)).all()
+
+    def export_girls(self, batch_size: int, loaders: tuple = GIRL_LOADERS, **filters) -> Iterator[list[models.Girl]]:
+        query = self.filter_girls(self.db.query(models.Girl).options(*loaders), **filters).order_by(models.Girl.id)
+        for girls in self.db.scalars(query.statement.execution_options(yield_per=batch_size)).partitions():
+            yield girls
 
     def create_girl(self, girl: schemas.GirlCreate) -> models.Girl:
         db_girl = models.Girl(**girl.model_dump())
         self.db.add(db_girl)
-        self.db.commit()
+        self.db.flush()
+        commit_catalog(self.db, {db_girl.id})
         self.db.refresh(db_girl)
         return db_girl
 
@@ -124,7 +432,7 @@ class GirlService:
         if db_girl:
             for key, value in girl.model_dump().items():
                 setattr(db_girl, key, value)
-            self.db.commit()
+            commit_catalog(self.db, {girl_id})
             self.db.refresh(db_girl)
         return db_girl
 
@@ -132,9 +440,65 @@ class GirlService:
         db_girl = self.get_girl(girl_id)
         if db_girl:
             self.db.delete(db_girl)
-            self.db.commit()
+            commit_catalog(self.db, {girl_id})
         return db_girl
 
+    @locked_write
+    def upsert_girls(self, girls: list[schemas.GirlUpsert]) -> list[schemas.BulkItemResult]:
+        girl_ids = [girl.id for girl in girls if girl.id is not None]
+        existing = {girl.id: girl for girl in self.get_girls_by_ids(girl_ids)} if girl_ids else {}
+        service_ids = set(self.db.scalars(select(models.Service.id)))
+        results, items, seen = [], [], set()
+        for index, girl in enumerate(girls):
+            unknown = {girl_service.service_id for girl_service in girl.services} - service_ids
+            if unknown:
+                results.append(bulk_failure(index, girl.id, f"Unknown service ids: {sorted(unknown)}"))
+            elif girl.id in seen:
+                results.append(bulk_failure(index, girl.id, "Duplicate id in batch"))
+            else:
+                items.append((index, girl.id, girl))
+                if girl.id is not None:
+                    seen.add(girl.id)
+
+        def write(girl: schemas.GirlUpsert) -> tuple[models.Girl, schemas.BulkStatus]:
+            db_girl = existing.get(girl.id)
+            if db_girl is None:
+                db_girl = models.Girl(**girl.model_dump(exclude={"photos", "prices", "services"}))
+                self.db.add(db_girl)
+                status = schemas.BulkStatus.CREATED
+            else:
+                for key, value in girl.model_dump(exclude={"id", "photos", "prices", "services"}).items():
+                    if getattr(db_girl, key) != value:
+                        setattr(db_girl, key, value)
+                status = schemas.BulkStatus.UPDATED
+            sync_collection(db_girl.photos, girl.photos, "file_url", models.Photo)
+            sync_collection(db_girl.prices, girl.prices, "hours", models.Price)
+            sync_collection(db_girl.services, girl.services, "service_id", models.GirlService)
+            return db_girl, status
+
+        results += apply_bulk(self.db, items, write)
+        commit_catalog(self.db, {result.id for result in results if result.status != schemas.BulkStatus.FAILED})
+        return sorted(results, key=lambda result: result.index)
+
+    @locked_write
+    def delete_girls(self, girl_ids: list[int]) -> list[schemas.BulkItemResult]:
+        existing = {girl.id: girl for girl in self.get_girls_by_ids(girl_ids)}
+        results, items = [], []
+        for index, girl_id in enumerate(girl_ids):
+            db_girl = existing.pop(girl_id, None)
+            if db_girl is None:
+                results.append(schemas.BulkItemResult(index=index, id=girl_id, status=schemas.BulkStatus.NOT_FOUND))
+            else:
+                items.append((index, girl_id, db_girl))
+
+        def write(db_girl: models.Girl) -> tuple[models.Girl, schemas.BulkStatus]:
+            self.db.delete(db_girl)
+            return db_girl, schemas.BulkStatus.DELETED
+
+        results += apply_bulk(self.db, items, write)
+        commit_catalog(self.db, {result.id for result in results if result.status != schemas.BulkStatus.FAILED})
+        return sorted(results, key=lambda result: result.index)
+
 
 class ServiceService:
     def __init__(self, db: Session):
@@ -149,7 +513,7 @@ class ServiceService:
     def create_service(self, service: schemas.ServiceCreate) -> models.Service:
         db_service = models.Service(**service.model_dump())
         self.db.add(db_service)
-        self.db.commit()
+        commit_catalog(self.db)
         self.db.refresh(db_service)
         return db_service
 
@@ -158,7 +522,7 @@ class ServiceService:
         if db_service:
             for key, value in service.model_dump().items():
                 setattr(db_service, key, value)
-            self.db.commit()
+            commit_catalog(self.db)
             self.db.refresh(db_service)
         return db_service
 
@@ -166,5 +530,237 @@ class ServiceService:
         db_service = self.get_service(service_id)
         if db_service:
             self.db.delete(db_service)
-            self.db.commit()
+            commit_catalog(self.db)
         return db_service
+
+    @locked_write
+    def upsert_services(self, services: list[schemas.ServiceUpsert]) -> list[schemas.BulkItemResult]:
+        service_ids = [service.id for service in services if service.id is not None]
+        existing = {
+            service.id: service
+            for service in self.db.query(models.Service).filter(models.Service.id.in_(service_ids))
+        } if service_ids else {}
+
+        def write(service: schemas.ServiceUpsert) -> tuple[models.Service, schemas.BulkStatus]:
+            db_service = existing.get(service.id)
+            if db_service is None:
+                db_service = models.Service(**service.model_dump())
+                self.db.add(db_service)
+                return db_service, schemas.BulkStatus.CREATED
+            for key, value in service.model_dump(exclude={"id"}).items():
+                if getattr(db_service, key) != value:
+                    setattr(db_service, key, value)
+            return db_service, schemas.BulkStatus.UPDATED
+
+        results, items, seen = [], [], set()
+        for index, service in enumerate(services):
+            if service.id in seen:
+                results.append(bulk_failure(index, service.id, "Duplicate id in batch"))
+            else:
+                items.append((index, service.id, service))
+                if service.id is not None:
+                    seen.add(service.id)
+
+        results += apply_bulk(self.db, items, write)
+        commit_catalog(self.db)
+        return sorted(results, key=lambda result: result.index)
+
+    @locked_write
+    def delete_services(self, service_ids: list[int]) -> list[schemas.BulkItemResult]:
+        existing = {
+            service.id: service
+            for service in self.db.query(models.Service)
+            .options(selectinload(models.Service.girl_services))
+            .filter(models.Service.id.in_(service_ids))
+        }
+        results, items = [], []
+        for index, service_id in enumerate(service_ids):
+            db_service = existing.pop(service_id, None)
+            if db_service is None:
+                results.append(schemas.BulkItemResult(index=index, id=service_id, status=schemas.BulkStatus.NOT_FOUND))
+            else:
+                items.append((index, service_id, db_service))
+
+        def write(db_service: models.Service) -> tuple[models.Service, schemas.BulkStatus]:
+            self.db.delete(db_service)
+            return db_service, schemas.BulkStatus.DELETED
+
+        results += apply_bulk(self.db, items, write)
+        commit_catalog(self.db)
+        return sorted(results, key=lambda result: result.index)
+
+
+def change_from_row(entity: models.ChangeEntity, row) -> dict:
+    data = {key: value for key, value in row.items() if key not in ("version", "updated_at")}
+    return {
+        "version": row["version"],
+        "entity": entity,
+        "id": row.get("id"),
+        "girl_id": row["id"] if entity == models.ChangeEntity.GIRL else row.get("girl_id"),
+        "service_id": row["id"] if entity == models.ChangeEntity.SERVICE else row.get("service_id"),
+        "deleted": False,
+        "updated_at": row["updated_at"],
+        "data": data,
+    }
+
+
+def change_from_tombstone(tombstone: models.Tombstone) -> dict:
+    return {
+        "version": tombstone.version,
+        "entity": models.ChangeEntity(tombstone.entity),
+        "id": tombstone.entity_id,
+        "girl_id": tombstone.girl_id,
+        "service_id": tombstone.service_id,
+        "deleted": True,
+        "updated_at": tombstone.deleted_at,
+        "data": None,
+    }
+
+
+class ChangeService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_catalog_version(self) -> models.CatalogVersion:
+        return self.db.query(models.CatalogVersion).filter(models.CatalogVersion.id == 1).populate_existing().one()
+
+    def get_changes(self, since: int, limit: int) -> dict:
+        catalog = self.get_catalog_version()
+        if since < catalog.pruned_version or since > catalog.version:
+            raise ChangesUnavailable(
+                f"Changes are available from version {catalog.pruned_version} to {catalog.version}; "
+                f"resync the catalog and continue from version {catalog.version}"
+            )
+
+        changes = []
+        for entity, model in models.CHANGE_TABLES.items():
+            table = model.__table__
+            rows = self.db.execute(
+                select(table)
+                .where(table.c.version > since, table.c.version <= catalog.version)
+                .order_by(table.c.version)
+                .limit(limit + 1)
+            ).mappings()
+            changes += [change_from_row(entity, row) for row in rows]
+        tombstones = (
+            self.db.query(models.Tombstone)
+            .filter(models.Tombstone.version > since, models.Tombstone.version <= catalog.version)
+            .order_by(models.Tombstone.version)
+            .limit(limit + 1)
+        )
+        changes += [change_from_tombstone(tombstone) for tombstone in tombstones]
+
+        changes.sort(key=lambda change: change["version"])
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        return {
+            "changes": changes,
+            "next_since": changes[-1]["version"] if has_more else catalog.version,
+            "has_more": has_more,
+            "version": catalog.version,
+        }
+
+    def get_changed_girl_ids(self, since: int) -> tuple[models.CatalogVersion, Optional[set[int]]]:
+        catalog = self.get_catalog_version()
+        if since < catalog.pruned_version or since > catalog.version:
+            return catalog, None
+
+        def changed(key, version):
+            return set(self.db.scalars(select(key).where(version > since, version <= catalog.version).distinct()))
+
+        if changed(models.Service.id, models.Service.version):
+            return catalog, None
+        girl_ids = changed(models.Girl.id, models.Girl.version)
+        for model in (models.Photo, models.Price, models.GirlService):
+            girl_ids |= changed(model.girl_id, model.version)
+        tombstones = self.db.execute(
+            select(models.Tombstone.entity, models.Tombstone.girl_id)
+            .where(models.Tombstone.version > since, models.Tombstone.version <= catalog.version)
+            .distinct()
+        )
+        for entity, girl_id in tombstones:
+            if entity == models.ChangeEntity.SERVICE:
+                return catalog, None
+            girl_ids.add(girl_id)
+        return catalog, girl_ids
+
+    def prune_tombstones(self, retention_days: int) -> int:
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=retention_days)
+        pruned_version = self.db.scalar(
+            select(func.max(models.Tombstone.version)).where(models.Tombstone.deleted_at < cutoff)
+        )
+        if pruned_version is None:
+            return 0
+        pruned = self.db.query(models.Tombstone).filter(models.Tombstone.version <= pruned_version).delete()
+        catalog = self.get_catalog_version()
+        catalog.pruned_version = max(catalog.pruned_version, pruned_version)
+        self.db.commit()
+        return pruned
+
+
+class AsyncGirlService:
+    def __init__(self, db):
+        self.db = db
+
+    async def get_girls(self, **filters) -> list[models.Girl]:
+        return await run_db(self.db, lambda db: GirlService(db).get_girls(**filters))
+
+    next_cursor = staticmethod(GirlService.next_cursor)
+
+    async def get_facets(self, **filters) -> dict:
+        return await run_db(self.db, lambda db: GirlService(db).get_facets(**filters))
+
+    async def get_girl(self, girl_id: int, loaders: tuple = GIRL_LOADERS) -> models.Girl | None:
+        return await run_db(self.db, lambda db: GirlService(db).get_girl(girl_id, loaders))
+
+    async def get_girls_by_ids(self, girl_ids: list[int], loaders: tuple = GIRL_LOADERS) -> list[models.Girl]:
+        return await run_db(self.db, lambda db: GirlService(db).get_girls_by_ids(girl_ids, loaders))
+
+    async def create_girl(self, girl: schemas.GirlCreate) -> models.Girl:
+        return await run_db(self.db, lambda db: GirlService(db).create_girl(girl))
+
+    async def update_girl(self, girl_id: int, girl: schemas.GirlCreate) -> models.Girl:
+        return await run_db(self.db, lambda db: GirlService(db).update_girl(girl_id, girl))
+
+    async def delete_girl(self, girl_id: int) -> models.Girl:
+        return await run_db(self.db, lambda db: GirlService(db).delete_girl(girl_id))
+
+    async def upsert_girls(self, girls: list[schemas.GirlUpsert]) -> list[schemas.BulkItemResult]:
+        return await run_db(self.db, lambda db: GirlService(db).upsert_girls(girls))
+
+    async def delete_girls(self, girl_ids: list[int]) -> list[schemas.BulkItemResult]:
+        return await run_db(self.db, lambda db: GirlService(db).delete_girls(girl_ids))
+
+
+class AsyncServiceService:
+    def __init__(self, db):
+        self.db = db
+
+    async def get_services(self) -> list[models.Service]:
+        return await run_db(self.db, lambda db: ServiceService(db).get_services())
+
+    async def get_service(self, service_id: int) -> models.Service | None:
+        return await run_db(self.db, lambda db: ServiceService(db).get_service(service_id))
+
+    async def create_service(self, service: schemas.ServiceCreate) -> models.Service:
+        return await run_db(self.db, lambda db: ServiceService(db).create_service(service))
+
+    async def update_service(self, service_id: int, service: schemas.ServiceCreate) -> models.Service:
+        return await run_db(self.db, lambda db: ServiceService(db).update_service(service_id, service))
+
+    async def delete_service(self, service_id: int) -> models.Service:
+        return await run_db(self.db, lambda db: ServiceService(db).delete_service(service_id))
+
+    async def upsert_services(self, services: list[schemas.ServiceUpsert]) -> list[schemas.BulkItemResult]:
+        return await run_db(self.db, lambda db: ServiceService(db).upsert_services(services))
+
+    async def delete_services(self, service_ids: list[int]) -> list[schemas.BulkItemResult]:
+        return await run_db(self.db, lambda db: ServiceService(db).delete_services(service_ids))
+
+
+class AsyncChangeService:
+    def __init__(self, db):
+        self.db = db
+
+    async def get_changes(self, since: int, limit: int) -> dict:
+        return await run_db(self.db, lambda db: ChangeService(db).get_changes(since, limit))
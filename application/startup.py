@@ -0,0 +1,107 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+
+from application.cache import catalog_generation
+from application.config import settings
+from application.database import SessionLocal, engine
+from application.initializer import Initializer
+from application.migrations import migrate
+from application.photos import generate_photo_variants
+from application.search import catalog_index
+from application.services import ChangeService
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def startup_lock(path: Path, blocking: bool = True):
+    if fcntl is None:
+        yield True
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as lock_file:
+        started = time.perf_counter()
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        waited = time.perf_counter() - started
+        if waited > 0.01:
+            logger.info(f"Waited {waited * 1000:.0f} ms for {path.name} (pid {os.getpid()}).")
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def phase(name: str, timings: dict[str, float]):
+    started = time.perf_counter()
+    yield
+    timings[name] = time.perf_counter() - started
+    logger.info(f"Startup phase '{name}' took {timings[name] * 1000:.0f} ms.")
+
+
+def generate_photo_variants_in_background():
+    with startup_lock(Path(settings.INIT_LOCK_FILE).with_suffix(".photos.lock"), blocking=False) as acquired:
+        if not acquired:
+            return
+        started = time.perf_counter()
+        count = generate_photo_variants()
+        logger.info(f"Photo variants generated for {count} photos in {time.perf_counter() - started:.1f}s.")
+
+
+def sync_catalog_version():
+    try:
+        with SessionLocal() as db:
+            catalog = ChangeService(db).get_catalog_version()
+    except OperationalError as e:
+        logger.warning(
+            f"Catalog version is unavailable, run migrations (start once with SKIP_INIT=false) "
+            f"before serving with SKIP_INIT=true: {e}"
+        )
+        catalog_generation.sync(0)
+        return
+    catalog_generation.sync(catalog.version, catalog.modified_at)
+
+
+def initialize() -> dict[str, float]:
+    timings = {}
+    Path(settings.PHOTO_VARIANTS_DIR).mkdir(parents=True, exist_ok=True)
+    if settings.SKIP_INIT:
+        logger.info("SKIP_INIT is set, skipping migrations and seeding.")
+        sync_catalog_version()
+        return timings
+
+    with startup_lock(Path(settings.INIT_LOCK_FILE)):
+        with phase("migrate", timings):
+            migrate(engine)
+        with phase("seed", timings):
+            Initializer().init_all()
+        with phase("prune_tombstones", timings):
+            with SessionLocal() as db:
+                ChangeService(db).prune_tombstones(settings.CHANGES_TOMBSTONE_RETENTION_DAYS)
+        sync_catalog_version()
+
+    if settings.PHOTO_VARIANTS_ON_STARTUP:
+        threading.Thread(target=generate_photo_variants_in_background, name="photo-variants", daemon=True).start()
+
+    if catalog_index.enabled:
+        with phase("catalog_index", timings):
+            with SessionLocal() as db:
+                catalog_index.refresh(db)
+
+    logger.info(f"Startup finished in {sum(timings.values()) * 1000:.0f} ms.")
+    return timings
@@ -0,0 +1,152 @@
+import argparse
+import datetime
+import json
+import random
+from pathlib import Path
+
+from application.models import BodyType, BreastType, Ethnicity, HairColor
+
+INIT_DATA_DIR = Path(__file__).parent.parent / "resources" / "init_data"
+
+NAMES = [
+    "Alina", "Anastasia", "Daria", "Diana", "Eva", "Irina", "Karina", "Kateryna", "Kira", "Lera",
+    "Liza", "Maria", "Marina", "Milana", "Nastya", "Natalia", "Olena", "Olga", "Polina", "Sofia",
+    "Svitlana", "Tetiana", "Vika", "Yana", "Yulia", "Zlata",
+]
+SERVICE_NAMES = [
+    ("Масаж", "Массаж", "Massage"),
+    ("Класичний масаж", "Классический массаж", "Classic massage"),
+    ("Тайський масаж", "Тайский массаж", "Thai massage"),
+    ("Стриптиз", "Стриптиз", "Striptease"),
+    ("Рольові ігри", "Ролевые игры", "Role play"),
+    ("Виїзд", "Выезд", "Outcall"),
+    ("Апартаменти", "Апартаменты", "Incall"),
+    ("Ніч", "Ночь", "Overnight"),
+    ("Супровід", "Сопровождение", "Escort"),
+    ("Вечеря", "Ужин", "Dinner date"),
+    ("Подорожі", "Путешествия", "Travel companion"),
+    ("Фотосесія", "Фотосессия", "Photo session"),
+    ("Танці", "Танцы", "Dance"),
+    ("Сауна", "Сауна", "Sauna"),
+    ("Вечірка", "Вечеринка", "Party"),
+]
+DESCRIPTION_WORDS = {
+    "ua": ["ніжна", "весела", "елегантна", "спортивна", "романтична", "досвідчена", "стильна", "уважна",
+           "масаж", "вечеря", "подорожі", "танці", "музика", "книги", "море", "йога"],
+    "ru": ["нежная", "весёлая", "элегантная", "спортивная", "романтичная", "опытная", "стильная", "внимательная",
+           "массаж", "ужин", "путешествия", "танцы", "музыка", "книги", "море", "йога"],
+    "en": ["gentle", "cheerful", "elegant", "sporty", "romantic", "experienced", "stylish", "attentive",
+           "massage", "dinner", "travel", "dancing", "music", "books", "sea", "yoga"],
+}
+HAIR_COLOR_WEIGHTS = {
+    HairColor.BLONDE: 30, HairColor.BRUNETTE: 30, HairColor.BROWN: 25, HairColor.FAIR: 10, HairColor.REDHEAD: 5,
+}
+ETHNICITY_WEIGHTS = {Ethnicity.SLAVIC: 80, Ethnicity.ASIAN: 10, Ethnicity.MULATTO: 10}
+BODY_TYPE_WEIGHTS = {BodyType.SLIM: 35, BodyType.FIT: 30, BodyType.SPORT: 20, BodyType.DENSE: 10, BodyType.FAT: 5}
+BREAST_TYPE_WEIGHTS = {BreastType.NATURAL: 75, BreastType.SILICONE: 25}
+PRICE_MULTIPLIERS = {1: 1.0, 2: 1.8, 3: 2.5, 8: 5.0}
+
+
+def weighted(rng: random.Random, weights: dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0].value
+
+
+def clamp(value: float, low: int, high: int) -> int:
+    return int(min(max(round(value), low), high))
+
+
+def generate_services(count: int) -> list[dict]:
+    services = []
+    for order in range(1, count + 1):
+        name_ua, name_ru, name_en = SERVICE_NAMES[(order - 1) % len(SERVICE_NAMES)]
+        suffix = "" if order <= len(SERVICE_NAMES) else f" {(order - 1) // len(SERVICE_NAMES) + 1}"
+        services.append({
+            "order": order,
+            "name_ua": name_ua + suffix,
+            "name_ru": name_ru + suffix,
+            "name_en": name_en + suffix,
+        })
+    return services
+
+
+def generate_description(rng: random.Random, lang: str) -> str:
+    words = rng.sample(DESCRIPTION_WORDS[lang], k=rng.randint(5, 10))
+    return " ".join(words).capitalize() + "."
+
+
+def generate_girl(rng: random.Random, number: int, service_count: int, today: datetime.date) -> dict:
+    age = clamp(rng.triangular(18, 45, 24), 18, 60)
+    birth_date = today - datetime.timedelta(days=age * 365 + rng.randint(0, 364))
+    height = clamp(rng.gauss(168, 7), 150, 200)
+    weight = clamp(rng.gauss(height - 112, 6), 40, 100)
+    base_price = clamp(rng.lognormvariate(8.0, 0.4), 1000, 8000) // 100 * 100
+    prices = []
+    for hours, multiplier in list(PRICE_MULTIPLIERS.items())[:rng.randint(1, len(PRICE_MULTIPLIERS))]:
+        current_cost = clamp(base_price * multiplier, 1000, 15000) // 100 * 100
+        old_cost = current_cost + rng.choice((500, 1000)) if rng.random() < 0.15 else None
+        prices.append({"hours": hours, "current_cost": current_cost, "old_cost": old_cost})
+    services = rng.sample(range(1, service_count + 1), k=rng.randint(min(3, service_count), min(15, service_count)))
+    return {
+        "name": rng.choice(NAMES),
+        "birth_date": birth_date.isoformat(),
+        "phone": f"+380{rng.choice((50, 63, 66, 67, 68, 73, 93, 95, 96, 97, 98, 99))}{rng.randint(0, 9999999):07d}",
+        "telegram": f"@girl{number}" if rng.random() < 0.6 else None,
+        "whatsapp": f"+380{rng.randint(500000000, 999999999)}" if rng.random() < 0.3 else None,
+        "height": height,
+        "weight": weight,
+        "breast_size": rng.choice((1, 1.5, 2, 2.5, 3, 3, 3.5, 4, 4.5, 5, 6)),
+        "hair_color": weighted(rng, HAIR_COLOR_WEIGHTS),
+        "ethnicity": weighted(rng, ETHNICITY_WEIGHTS),
+        "body_type": weighted(rng, BODY_TYPE_WEIGHTS),
+        "breast_type": weighted(rng, BREAST_TYPE_WEIGHTS),
+        "has_tattoo": rng.random() < 0.3,
+        "has_piercing": rng.random() < 0.2,
+        "is_verified": rng.random() < 0.7,
+        "description_ua": generate_description(rng, "ua"),
+        "description_ru": generate_description(rng, "ru"),
+        "description_en": generate_description(rng, "en"),
+        "photos": [
+            {"file_url": f"/photos/girl_{number}_{order}.jpg", "order": order}
+            for order in range(1, rng.randint(2, 8) + 1)
+        ],
+        "prices": prices,
+        "services": [
+            {"service_id": service_id, "additional_cost": rng.choice((500, 1000, 2000)) if rng.random() < 0.2 else None}
+            for service_id in sorted(services)
+        ],
+    }
+
+
+def write_catalog(output: Path, girls: int, services: int, seed: int):
+    output.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    today = datetime.date.today()
+
+    with open(output / "services.json", "w", encoding="utf-8") as file:
+        json.dump(generate_services(services), file, ensure_ascii=False, indent=2)
+
+    with open(output / "girls.json", "w", encoding="utf-8") as file:
+        file.write("[\n")
+        for number in range(1, girls + 1):
+            if number > 1:
+                file.write(",\n")
+            file.write(json.dumps(generate_girl(rng, number, services, today), ensure_ascii=False))
+        file.write("\n]\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic catalog for resources/init_data.")
+    parser.add_argument("--girls", type=int, default=10_000)
+    parser.add_argument("--services", type=int, default=len(SERVICE_NAMES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=INIT_DATA_DIR)
+    args = parser.parse_args()
+    if args.services < 1:
+        parser.error("--services must be at least 1")
+
+    write_catalog(args.output, args.girls, args.services, args.seed)
+    print(f"Wrote {args.girls} girls and {args.services} services to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
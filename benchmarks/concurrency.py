@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from benchmarks.asgi import request
+
+
+def workload(girl_ids: list[int], size: int, seed: int = 0) -> list[tuple[str, dict]]:
+    rng = random.Random(seed)
+    sorts = ["default", "price_up", "price_down", "age_up", "weight_down", "bust_up"]
+    requests = []
+    for _ in range(size):
+        roll = rng.random()
+        if roll < 0.5:
+            requests.append(("/girls/", {"sort_by": rng.choice(sorts), "skip": rng.randint(0, 200), "limit": 20}))
+        elif roll < 0.9:
+            requests.append((f"/girls/{rng.choice(girl_ids)}", {"lang": rng.choice(["uk", "ru", "en"])}))
+        else:
+            requests.append(("/services/", {"lang": rng.choice(["uk", "ru", "en"])}))
+    return requests
+
+
+async def drive(app, requests: list[tuple[str, dict]], concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(path, params):
+        nonlocal errors
+        async with semaphore:
+            try:
+                status, _, _ = await request(app, path, params)
+            except Exception:
+                status = 500
+            if status >= 500:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(path, params) for path, params in requests))
+    elapsed = time.perf_counter() - started
+    return {"requests": len(requests), "seconds": round(elapsed, 3), "rps": round(len(requests) / elapsed, 1), "errors": errors}
+
+
+def run_worker(args):
+    from main import app
+    from application import models
+    from application.database import SessionLocal
+
+    async def warm_then_measure():
+        async with app.router.lifespan_context(app):
+            with SessionLocal() as db:
+                girl_ids = [girl_id for (girl_id,) in db.query(models.Girl.id).all()]
+            if not girl_ids:
+                sys.exit("The database has no girls; seed resources/init_data first.")
+            requests = workload(girl_ids, args.requests)
+            await drive(app, requests[:50], args.concurrency)
+            return await drive(app, requests, args.concurrency)
+
+    print(json.dumps(asyncio.run(warm_then_measure())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sync and async database modes under concurrent load.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        args.concurrency = args.concurrency[0]
+        return run_worker(args)
+
+    env = dict(os.environ, LISTING_CACHE_SIZE="0", RENDERED_CACHE_SIZE="0")
+    print(f"{'mode':<8}{'concurrency':>12}{'rps':>10}{'seconds':>10}{'errors':>8}")
+    for concurrency in args.concurrency:
+        for mode in ("sync", "async"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.concurrency", "--worker",
+                 "--requests", str(args.requests), "--concurrency", str(concurrency)],
+                env=dict(env, DATABASE_ASYNC=str(mode == "async").lower()),
+                capture_output=True, text=True, check=True,
+            ).stdout.strip().splitlines()[-1]
+            result = json.loads(output)
+            print(f"{mode:<8}{concurrency:>12}{result['rps']:>10}{result['seconds']:>10}{result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
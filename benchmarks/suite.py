@@ -0,0 +1,173 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.asgi import request
+
+FILTERS = {
+    "all": {},
+    "age": {"min_age": 20, "max_age": 30},
+    "body": {"min_height": 160, "max_height": 175, "min_weight": 45, "max_weight": 60},
+    "price": {"min_price": 2000, "max_price": 5000},
+    "services_any": {"match": "any"},
+    "services_all": {"match": "all"},
+}
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def build_cases(girl_ids: list[int], service_ids: list[int], sorts: list[str], size: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    cases = {}
+    for (filter_name, params), sort_by in itertools.product(FILTERS.items(), sorts):
+        params = dict(params, sort_by=sort_by, limit=20)
+        if "match" in params:
+            params["service_ids"] = service_ids[:2]
+        cases[f"girls:{filter_name}:{sort_by}"] = [
+            ("/girls/", dict(params, skip=rng.choice((0, 0, 0, 20, 100)))) for _ in range(size)
+        ]
+    cases["girl"] = [
+        (f"/girls/{rng.choice(girl_ids)}", {"lang": rng.choice(("uk", "ru", "en"))}) for _ in range(size)
+    ]
+    cases["services"] = [("/services/", {"lang": rng.choice(("uk", "ru", "en"))}) for _ in range(size)]
+    return cases
+
+
+def executed_statements() -> float:
+    from application.metrics import db_statements
+    return sum(db_statements.values.values())
+
+
+async def measure(app, requests: list[tuple[str, dict]], concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(path, params):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                status, _, _ = await request(app, path, params)
+            except Exception:
+                status = 500
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors += 1
+
+    statements = executed_statements()
+    started = time.perf_counter()
+    await asyncio.gather(*(one(path, params) for path, params in requests))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(requests),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "rps": round(len(requests) / elapsed, 1),
+        "queries_per_request": round((executed_statements() - statements) / len(requests), 2),
+    }
+
+
+async def run(args) -> dict:
+    from main import app
+    from application import models
+    from application.config import settings
+    from application.database import SessionLocal
+    from application.services import SortBy
+
+    async with app.router.lifespan_context(app):
+        with SessionLocal() as db:
+            girl_ids = [girl_id for (girl_id,) in db.query(models.Girl.id).all()]
+            service_ids = [service_id for (service_id,) in db.query(models.Service.id).order_by(models.Service.id)]
+        if not girl_ids or not service_ids:
+            sys.exit("The database is empty; run `python -m benchmarks.catalog` and start the app once to seed it.")
+
+        sorts = args.sort or [sort_by.value for sort_by in SortBy]
+        cases = build_cases(girl_ids, service_ids, sorts, args.requests, args.seed)
+        if args.case:
+            cases = {name: requests for name, requests in cases.items() if any(part in name for part in args.case)}
+
+        results = {}
+        for name, requests in cases.items():
+            await measure(app, requests[:args.warmup], args.concurrency)
+            results[name] = await measure(app, requests, args.concurrency)
+            result = results[name]
+            print(
+                f"{name:<32}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}"
+                f"{result['rps']:>10}{result['queries_per_request']:>9}{result['errors']:>8}",
+                flush=True,
+            )
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "girls": len(girl_ids),
+            "services": len(service_ids),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "cold": args.cold,
+            "database_async": settings.DATABASE_ASYNC,
+            "search_engine": settings.SEARCH_ENGINE,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict):
+    print(f"\n{'case':<32}{'p95 base':>10}{'p95 now':>10}{'change':>9}{'rps base':>10}{'rps now':>10}")
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        change = (result["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100 if previous["p95_ms"] else 0.0
+        print(
+            f"{name:<32}{previous['p95_ms']:>10}{result['p95_ms']:>10}{change:>+8.1f}%"
+            f"{previous['rps']:>10}{result['rps']:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark listing, profile and service endpoints in-process.")
+    parser.add_argument("--requests", type=int, default=200, help="requests per case")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per case")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--sort", nargs="+", help="sort_by values to include (default: all)")
+    parser.add_argument("--case", nargs="+", help="only run cases whose name contains one of these")
+    parser.add_argument("--cold", action="store_true", help="disable the in-process response caches")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare p95 latency and throughput with")
+    args = parser.parse_args()
+
+    os.environ["METRICS_ENABLED"] = "true"
+    if args.cold:
+        os.environ.update(LISTING_CACHE_SIZE="0", RENDERED_CACHE_SIZE="0")
+
+    print(f"{'case':<32}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>10}{'queries':>9}{'errors':>8}")
+    report = asyncio.run(run(args))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.compare:
+        compare(json.loads(args.compare.read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
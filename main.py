@@ -1,20 +1,57 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
-from starlette.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 
+from application.cache_sync import catalog_watcher
+from application.compression import CompressionMiddleware
 from application.config import settings
-from application.database import engine, Base
-from application.initializer import Initializer
-from application.routers import girl_router, service_router
+from application.database import dispose_engines
+from application.http_cache import CachedStaticFiles
+from application.photos import PHOTOS_DIR, VARIANTS_URL
+from application.metrics import MetricsMiddleware
+from application.routers import (
+    girl_router, service_router, change_router, admin_router, cache_router, metrics_router,
+)
+from application.startup import initialize
 
-app = FastAPI(title="Escort Service API", version="1.0.0")
-app.mount("/photos", StaticFiles(directory="resources/photos"), name="photos")
-app.include_router(girl_router)
-app.include_router(service_router)
 
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(initialize)
+    watcher = asyncio.create_task(catalog_watcher.run()) if catalog_watcher.enabled else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await watcher
+    await dispose_engines()
 
-initializer = Initializer()
-initializer.init_all()
+
+app = FastAPI(title="Escort Service API", version="1.0.0", lifespan=lifespan)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+app.mount(
+    VARIANTS_URL,
+    CachedStaticFiles(
+        directory=settings.PHOTO_VARIANTS_DIR, check_dir=False, cache_control="public, max-age=31536000, immutable"
+    ),
+    name="photo_variants",
+)
+app.mount(
+    "/photos",
+    CachedStaticFiles(directory=PHOTOS_DIR, cache_control=f"public, max-age={settings.PHOTO_CACHE_MAX_AGE}"),
+    name="photos",
+)
+app.include_router(girl_router)
+app.include_router(service_router)
+app.include_router(change_router)
+app.include_router(admin_router)
+app.include_router(cache_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+import os
+import tempfile
+from datetime import date
+
+import pytest
+
+DATA_DIR = tempfile.mkdtemp(prefix="escort-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{DATA_DIR}/escort.db",
+    INIT_LOCK_FILE=f"{DATA_DIR}/.init.lock",
+    PHOTO_VARIANTS_DIR=f"{DATA_DIR}/photo_variants",
+    SKIP_INIT="true",
+    SEARCH_ENGINE="sql",
+    LISTING_CACHE_SIZE="0",
+    RENDERED_CACHE_SIZE="0",
+    ADMIN_TOKEN="test-token",
+)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from application import schemas
+from application.database import SessionLocal, engine
+from application.migrations import migrate
+from application.services import GirlService, ServiceService
+from main import app
+
+GIRLS = 30
+
+
+def girl(number: int, service_ids: list[int]) -> schemas.GirlUpsert:
+    return schemas.GirlUpsert(
+        name=f"Girl{number}",
+        birth_date=date(1990 + number % 10, 1, 1),
+        phone="+380000000000",
+        height=160 + number % 20,
+        weight=50 + number % 20,
+        breast_size=2 + number % 3,
+        hair_color="blonde",
+        ethnicity="slavic",
+        body_type="slim",
+        breast_type="natural",
+        photos=[{"file_url": f"/photos/{number}_{order}.jpg", "order": order} for order in range(3)],
+        prices=[{"hours": hours, "current_cost": 2000 * hours} for hours in (1, 2)],
+        services=[{"service_id": service_id} for service_id in service_ids],
+    )
+
+
+@pytest.fixture(scope="session")
+def client():
+    migrate(engine)
+    with SessionLocal() as db:
+        ServiceService(db).upsert_services([
+            schemas.ServiceUpsert(name_ua=f"Послуга {order}", name_ru=f"Услуга {order}", name_en=f"Service {order}", order=order)
+            for order in range(5)
+        ])
+        GirlService(db).upsert_girls([girl(number, [1, 2, 3]) for number in range(GIRLS)])
+    return TestClient(app)
+
+
+@pytest.fixture
+def selects():
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine, "before_cursor_execute", count)
@@ -0,0 +1,63 @@
+import pytest
+
+from application import schemas
+from application.database import SessionLocal
+from application.services import GirlService
+
+from tests.conftest import girl
+
+ADMIN = {"x-admin-token": "test-token"}
+
+
+@pytest.mark.parametrize("field, value", [
+    ("height", 10**20),
+    ("weight", -1),
+    ("breast_size", 1e300),
+    ("id", 2**63),
+])
+def test_upsert_rejects_out_of_range_profile(client, field, value):
+    item = dict(girl(2000, []).model_dump(mode="json"), **{field: value})
+
+    response = client.put("/admin/girls", json=[item], headers=ADMIN)
+
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("collection, entry", [
+    ("prices", {"hours": 1, "current_cost": 10**20}),
+    ("prices", {"hours": 0, "current_cost": 1000}),
+    ("photos", {"file_url": "/photos/x.jpg", "order": 10**20}),
+    ("services", {"service_id": 1, "additional_cost": 10**20}),
+])
+def test_upsert_rejects_out_of_range_children(client, collection, entry):
+    item = dict(girl(2000, []).model_dump(mode="json"), **{collection: [entry]})
+
+    response = client.put("/admin/girls", json=[item], headers=ADMIN)
+
+    assert response.status_code == 422
+
+
+def test_overflow_fails_only_its_item(client):
+    overflowing = girl(2001, []).model_copy(update={"height": 10**20})
+
+    with SessionLocal() as db:
+        results = GirlService(db).upsert_girls([overflowing, girl(2002, [])])
+        GirlService(db).delete_girls([result.id for result in results if result.id is not None])
+
+    assert [result.status for result in results] == [schemas.BulkStatus.FAILED, schemas.BulkStatus.CREATED]
+
+
+@pytest.mark.parametrize("collection, entries", [
+    ("prices", [{"hours": 1, "current_cost": 1000}, {"hours": 1, "current_cost": 2000}]),
+    ("photos", [{"file_url": "/photos/x.jpg", "order": 0}, {"file_url": "/photos/x.jpg", "order": 1}]),
+    ("services", [{"service_id": 1}, {"service_id": 1, "additional_cost": 500}]),
+])
+def test_upsert_rejects_duplicate_children(client, collection, entries):
+    items = [girl(2003, []).model_dump(mode="json"), dict(girl(2004, []).model_dump(mode="json"), **{collection: entries})]
+
+    response = client.put("/admin/girls", json=items, headers=ADMIN)
+
+    assert response.status_code == 422
+    [error] = response.json()["detail"]
+    assert error["loc"][:2] == ["body", 1]
+    assert collection in error["msg"]
@@ -0,0 +1,49 @@
+from datetime import timezone
+from email.utils import format_datetime
+
+from application import schemas
+from application.cache import catalog_generation
+from application.database import SessionLocal
+from application.services import ChangeService, GirlService
+
+from tests.conftest import girl
+
+
+def test_create_girl_invalidates_her_profile(client):
+    version = catalog_generation.version
+    with SessionLocal() as db:
+        profile = girl(1000, []).model_dump(exclude={"id", "photos", "prices", "services"})
+        created = GirlService(db).create_girl(schemas.GirlCreate(**profile))
+
+    assert created.id in catalog_generation.girl_values
+    assert None not in catalog_generation.girl_values
+    assert catalog_generation.profile(created.id) != (catalog_generation.profile_value, 0)
+    assert catalog_generation.version > version
+
+    response = client.get(f"/girls/{created.id}")
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith(f'W/"{catalog_generation.version}-')
+
+
+def test_last_modified_follows_the_persisted_catalog(client):
+    with SessionLocal() as db:
+        catalog = ChangeService(db).get_catalog_version()
+        expected = format_datetime(catalog.modified_at.replace(tzinfo=timezone.utc), usegmt=True)
+        catalog_generation.sync(catalog.version, catalog.modified_at)
+
+    response = client.get("/services/")
+
+    assert response.headers["last-modified"] == expected
+
+
+def test_not_modified_varies_by_encoding(client):
+    etag = client.get("/girls/1").headers["etag"]
+
+    response = client.get("/girls/1", headers={"if-none-match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_etag_skips_empty_parts():
+    assert catalog_generation.etag("girl", 1, "uk", "") == f'W/"{catalog_generation.version}-girl-1-uk"'
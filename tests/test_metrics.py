@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from application.database import SessionLocal, engine
+from application.metrics import RequestStats, request_stats
+
+
+@pytest.fixture
+def stats():
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    yield stats
+    request_stats.reset(token)
+
+
+def test_transaction_control_is_not_counted(client, stats):
+    with SessionLocal() as db:
+        with db.begin_nested():
+            db.execute(text("SELECT 1"))
+        db.execute(text("SELECT 2"))
+        db.commit()
+
+    assert stats.statements == 2
+
+
+def test_failed_statement_releases_its_timer(client, stats):
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.exec_driver_sql("SELECT * FROM missing_table")
+        assert connection.info["query_started"] == []
+        connection.exec_driver_sql("SELECT 1")
+
+    assert stats.statements == 1
@@ -0,0 +1,26 @@
+import pytest
+
+from tests.conftest import GIRLS
+
+
+@pytest.mark.parametrize("params", [{"limit": 1}, {"limit": 100}, {"limit": 100, "sort_by": "price_up"}])
+def test_girls_listing_loads_relationships_in_fixed_queries(client, selects, params):
+    response = client.get("/girls/", params=params)
+    assert response.status_code == 200
+    assert len(response.json()) == min(params["limit"], GIRLS)
+    assert len(selects) == 4
+
+
+@pytest.mark.parametrize("lang", ["uk", "en"])
+def test_girl_profile_loads_relationships_in_fixed_queries(client, selects, lang):
+    response = client.get("/girls/1", params={"lang": lang})
+    assert response.status_code == 200
+    assert len(response.json()["services"]) == 3
+    assert len(selects) == 5
+
+
+def test_services_load_in_one_query(client, selects):
+    response = client.get("/services/")
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+    assert len(selects) == 1
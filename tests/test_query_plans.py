@@ -0,0 +1,24 @@
+import pytest
+
+from application.database import SessionLocal
+from application.migrations import LISTING_FILTERS, explain_girls_query, full_scans
+from application.services import ServiceMatch, SortBy
+
+FILTERS = {
+    "none": {},
+    "ranges": LISTING_FILTERS,
+    "price": dict(price_min=1000, price_max=15000),
+    "services_any": dict(service_ids=[1, 2]),
+    "services_all": dict(service_ids=[1, 2], service_match=ServiceMatch.ALL),
+    "ranges_services": dict(LISTING_FILTERS, service_ids=[1, 2]),
+}
+
+
+@pytest.mark.parametrize("paginate", [False, True], ids=["first_page", "cursor"])
+@pytest.mark.parametrize("filters", FILTERS.values(), ids=FILTERS.keys())
+@pytest.mark.parametrize("sort_by", list(SortBy), ids=[sort_by.value for sort_by in SortBy])
+def test_listing_has_no_full_scans(client, sort_by, filters, paginate):
+    with SessionLocal() as db:
+        plan = explain_girls_query(db, sort_by, paginate, **filters)
+
+    assert full_scans(plan, rowid_order=sort_by == SortBy.DEFAULT) == [], plan